@@ -0,0 +1,71 @@
+# accounts/dashboard.py
+"""
+Doctor dashboard summary.
+
+All counters come from one query (scalar COUNT subqueries on the doctor's
+user row) and are cached per doctor under the schedule version that
+appointments bump on every change, so a booking or status change shows up
+immediately. Service/publication/achievement counts may lag by at most
+DOCTOR_DASHBOARD_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from appointments import cache as slot_cache
+from appointments.models import Appointment, Service
+from publications.models import Achievement, Publication
+
+User = get_user_model()
+
+
+def _count(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.filter(doctor=OuterRef("pk"))
+            .order_by()
+            .values("doctor")
+            .annotate(n=Count("pk"))
+            .values("n"),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def _summary_key(doctor_id, version, day) -> str:
+    return f"dashboard:{doctor_id}:v{version}:{day.isoformat()}"
+
+
+def doctor_summary(doctor) -> dict:
+    today = timezone.localdate()
+    key = _summary_key(doctor.pk, slot_cache.get_schedule_version(doctor.pk), today)
+
+    summary = cache.get(key)
+    if summary is None:
+        summary = (
+            User.objects.filter(pk=doctor.pk)
+            .annotate(
+                today_count=_count(Appointment.objects.filter(
+                    availability__date=today,
+                    status=Appointment.STATUS_CONFIRMED,
+                )),
+                pending_count=_count(Appointment.objects.filter(status=Appointment.STATUS_PENDING)),
+                services_count=_count(Service.objects.all()),
+                publications_count=_count(Publication.objects.all()),
+                achievements_count=_count(Achievement.objects.all()),
+            )
+            .values(
+                "today_count",
+                "pending_count",
+                "services_count",
+                "publications_count",
+                "achievements_count",
+            )
+            .get()
+        )
+        cache.set(key, summary, timeout=settings.DOCTOR_DASHBOARD_CACHE_TIMEOUT)
+    return summary
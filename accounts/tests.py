@@ -1,3 +1,148 @@
-from django.test import TestCase
+from datetime import time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Template, Context
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.dashboard import doctor_summary
+from accounts.views import DoctorDashboardView, PatientDashboardView
+from appointments.booking import book_appointment
+from appointments.models import Appointment, Availability, Service
+from appointments.transitions import transition_appointment
+from core.nplusone import NPlusOneError, assert_no_n_plus_one
+
+User = get_user_model()
+
+
+class DoctorDashboardSummaryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        date = timezone.localdate() + timedelta(days=1)
+        self.appointments = [
+            book_appointment(Appointment(
+                service=self.service,
+                availability=Availability(date=date, start_time=time(9 + i, 0), end_time=time(9 + i, 30)),
+                patient_name="Jane Doe",
+                patient_email="jane@example.com",
+            ))
+            for i in range(3)
+        ]
+
+    def test_counts_in_one_query_then_from_cache(self):
+        with self.assertNumQueries(1):
+            summary = doctor_summary(self.doctor)
+        self.assertEqual(summary["pending_count"], 3)
+        self.assertEqual(summary["services_count"], 1)
+        self.assertEqual(summary["publications_count"], 0)
+
+        with self.assertNumQueries(0):
+            doctor_summary(self.doctor)
+
+    def test_appointment_change_invalidates_summary(self):
+        doctor_summary(self.doctor)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_appointment(
+                pk=self.appointments[0].pk,
+                doctor=self.doctor,
+                target=Appointment.STATUS_CONFIRMED,
+            )
+
+        self.assertEqual(doctor_summary(self.doctor)["pending_count"], 2)
+
+    def test_dashboard_view_query_budget(self):
+        request = RequestFactory().get("/accounts/dashboard/doctor/")
+        request.user = self.doctor
+
+        # summary + today's schedule + first pending requests
+        with self.assertNumQueries(3):
+            response = DoctorDashboardView.as_view()(request)
+        self.assertEqual(len(response.context_data["pending_appointments"]), 3)
+
+
+class DoctorDashboardNPlusOneTest(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        today = timezone.localdate()
+        for i in range(4):
+            patient = User.objects.create_user(username=f"patient{i}", password="pass123")
+            book_appointment(Appointment(
+                service=service,
+                patient=patient,
+                availability=Availability(date=today, start_time=time(9 + i, 0), end_time=time(9 + i, 30)),
+                patient_name="Jane Doe",
+                patient_email="jane@example.com",
+                status=Appointment.STATUS_CONFIRMED if i % 2 else Appointment.STATUS_PENDING,
+            ))
+
+    def test_dashboard_renders_without_repeated_queries(self):
+        self.client.force_login(self.doctor)
+
+        with assert_no_n_plus_one():
+            response = self.client.get(reverse("accounts:doctor-dashboard"), HTTP_HOST="localhost:8000")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "patient1")
+
+    def test_detector_reports_the_template_line(self):
+        template = Template(
+            "{% for appt in appointments %}\n{{ appt.patient.username }}\n{% endfor %}"
+        )
+        appointments = list(Appointment.objects.filter(doctor=self.doctor))
+
+        with self.assertRaisesMessage(NPlusOneError, ":2"):
+            with assert_no_n_plus_one():
+                template.render(Context({"appointments": appointments}))
+
+
+class PatientDashboardTotalTest(TestCase):
+    def setUp(self):
+        doctor = User.objects.create_user(username="doctor1", password="pass123", role=User.ROLE_DOCTOR)
+        service = Service.objects.create(doctor=doctor, name="Consultation", duration_minutes=30)
+        self.patient = User.objects.create_user(username="patient1", password="pass123")
+        date = timezone.localdate() + timedelta(days=1)
+        for i in range(3):
+            book_appointment(Appointment(
+                service=service,
+                patient=self.patient,
+                availability=Availability(date=date, start_time=time(9 + i, 0), end_time=time(9 + i, 30)),
+                patient_name="Jane Doe",
+                patient_email="jane@example.com",
+            ))
+        self.client.force_login(self.patient)
+
+    def _get(self):
+        return self.client.get(reverse("accounts:patient-dashboard"), HTTP_HOST="localhost:8000")
+
+    def test_total_is_counted_by_the_view(self):
+        response = self._get()
+        self.assertEqual(response.context["appointment_total"], 3)
+        self.assertFalse(response.context["appointment_total_capped"])
+
+    def test_total_is_capped(self):
+        with mock.patch.object(PatientDashboardView, "total_limit", 2):
+            response = self._get()
+        self.assertContains(response, "2+")
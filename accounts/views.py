@@ -13,9 +13,10 @@ from django.utils import timezone
 from django.views import View
 from django.views.generic import CreateView, ListView, TemplateView
 
+from .dashboard import doctor_summary
 from .forms import UserRegisterForm, StyledAuthenticationForm
-from appointments.models import Appointment, Service
-from publications.models import Publication, Achievement
+from appointments.models import Appointment
+from appointments.pagination import KeysetPaginationMixin, capped_count
 from core_app.mixins import SEOMixin
 
 User = get_user_model()
@@ -84,8 +85,11 @@ class DoctorDashboardView(SEOMixin, LoginRequiredMixin, UserPassesTestMixin, Tem
         context = super().get_context_data(**kwargs)
         today = timezone.localdate()
 
-        context["today_appointments"] = (
-            Appointment.objects.select_related("service", "availability")
+        context["summary"] = doctor_summary(self.request.user)
+
+        # The template shows appt.patient for every row
+        context["today_appointments"] = list(
+            Appointment.objects.select_related("service", "availability", "patient")
             .filter(
                 doctor=self.request.user,
                 availability__date=today,
@@ -94,22 +98,22 @@ class DoctorDashboardView(SEOMixin, LoginRequiredMixin, UserPassesTestMixin, Tem
             .order_by("availability__start_time")
         )
 
-        context["pending_appointments"] = (
-            Appointment.objects.select_related("service", "availability")
+        # Only the first few are listed; the total comes from the summary
+        context["pending_appointments"] = list(
+            Appointment.objects.select_related("service", "availability", "patient")
             .filter(doctor=self.request.user, status=Appointment.STATUS_PENDING)
-            .order_by("-created_at")
+            .order_by("-created_at")[:5]
         )
-
-        context["services_count"] = Service.objects.filter(doctor=self.request.user).count()
-        context["publications_count"] = Publication.objects.filter(doctor=self.request.user).count()
-        context["achievements_count"] = Achievement.objects.filter(doctor=self.request.user).count()
         return context
 
 
-class PatientDashboardView(SEOMixin, LoginRequiredMixin, ListView):
+class PatientDashboardView(SEOMixin, LoginRequiredMixin, KeysetPaginationMixin, ListView):
     template_name = "accounts/dashboards/patient_dashboard.html"
     context_object_name = "appointments"
     paginate_by = 10
+    # The summary shows its own capped total (get_context_data)
+    count_mode = None
+    total_limit = 100
 
     seo_title = "Patient Dashboard"
     seo_robots = "noindex, nofollow"
@@ -118,5 +122,13 @@ class PatientDashboardView(SEOMixin, LoginRequiredMixin, ListView):
         return (
             Appointment.objects.select_related("service", "availability")
             .filter(patient=self.request.user)
-            .order_by("-created_at")
+            .order_by("-created_at", "-id")
         )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Shown as "100+" past the limit
+        context["appointment_total"], context["appointment_total_capped"] = capped_count(
+            self.object_list, self.total_limit
+        )
+        return context
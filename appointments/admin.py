@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Service, Availability, Appointment
+from .models import Service, Availability, Appointment, CalendarFeed, DayAvailability
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
@@ -8,6 +8,14 @@ class ServiceAdmin(admin.ModelAdmin):
 
 @admin.action(description="Mark selected slots as available")
 def make_available(modeladmin, request, queryset):
+    # Release the minutes in the day bitmap as well, not just the row flag
+    for slot in queryset.filter(is_available=False):
+        DayAvailability.release(
+            doctor_id=slot.doctor_id,
+            date=slot.date,
+            start_time=slot.start_time,
+            end_time=slot.end_time,
+        )
     queryset.update(is_available=True)
 
 @admin.register(Availability)
@@ -36,6 +44,19 @@ class AvailabilityAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(DayAvailability)
+class DayAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ("doctor", "date", "booked_minutes", "version")
+    list_filter = ("doctor",)
+    date_hierarchy = "date"
+    ordering = ("date",)
+    readonly_fields = ("version",)
+    exclude = ("occupancy",)
+
+    @admin.display(description="Booked minutes")
+    def booked_minutes(self, obj):
+        return obj.bitmap.bit_count()
+
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = ("patient_name", "service", "status", "created_at")
@@ -44,8 +65,13 @@ class AppointmentAdmin(admin.ModelAdmin):
     list_select_related = ("doctor", "patient", "service")
 
 
+@admin.action(description="Regenerate feed tokens (revokes the current links)")
+def regenerate_tokens(modeladmin, request, queryset):
+    for feed in queryset:
+        feed.regenerate()
 
-
-
-
-    
+@admin.register(CalendarFeed)
+class CalendarFeedAdmin(admin.ModelAdmin):
+    list_display = ("doctor", "issued_at")
+    exclude = ("token",)
+    actions = [regenerate_tokens]
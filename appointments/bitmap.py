@@ -0,0 +1,62 @@
+# appointments/bitmap.py
+"""
+Minute-granular occupancy bitmaps for a single doctor-day.
+
+Bit ``n`` (least significant first) represents minute ``n`` after midnight.
+A set bit means the minute is booked. The bitmap is stored as fixed-width
+bytes on ``DayAvailability.occupancy`` and manipulated as a Python int.
+"""
+from __future__ import annotations
+
+from datetime import time
+from typing import List, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+BITMAP_BYTES = MINUTES_PER_DAY // 8
+
+
+def empty_bitmap() -> bytes:
+    return bytes(BITMAP_BYTES)
+
+
+def to_int(raw) -> int:
+    if not raw:
+        return 0
+    return int.from_bytes(bytes(raw), "little")
+
+
+def to_bytes(value: int) -> bytes:
+    return value.to_bytes(BITMAP_BYTES, "little")
+
+
+def minute_of_day(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+
+def time_of_minute(minute: int) -> time:
+    return time(minute // 60, minute % 60)
+
+
+def span_mask(start: int, end: int) -> int:
+    """Mask covering minutes [start, end)."""
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def is_free(bitmap: int, start: int, end: int) -> bool:
+    return not bitmap & span_mask(start, end)
+
+
+def free_spans(bitmap: int, day_start: int, day_end: int, step: int) -> List[Tuple[int, int]]:
+    """
+    Slots of ``step`` minutes laid out from ``day_start`` that fit before
+    ``day_end`` and do not overlap any booked minute.
+    """
+    spans = []
+    cursor = day_start
+    while cursor + step <= day_end:
+        if is_free(bitmap, cursor, cursor + step):
+            spans.append((cursor, cursor + step))
+        cursor += step
+    return spans
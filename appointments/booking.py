@@ -0,0 +1,45 @@
+# appointments/booking.py
+"""
+Optimistic booking path.
+
+The slot is claimed with a single conditional UPDATE on the doctor's day
+bitmap (compare-and-swap on DayAvailability.version), then the Availability
+and Appointment rows are inserted in the same short transaction. No row is
+locked with SELECT ... FOR UPDATE and full_clean() is skipped because the
+form has already validated everything except the race itself.
+
+A lost race surfaces as SlotUnavailableError ("slot taken").
+"""
+from django.db import transaction
+
+from .models import Appointment, DayAvailability
+
+
+def book_appointment(appointment: Appointment) -> Appointment:
+    """
+    Persist an unsaved appointment that has `service` and an unsaved
+    `availability` (date/start_time/end_time) attached.
+    """
+    service = appointment.service
+    availability = appointment.availability
+
+    if appointment.status not in Appointment.LOCKED_STATUSES:
+        appointment.status = Appointment.STATUS_PENDING
+
+    with transaction.atomic():
+        DayAvailability.claim(
+            doctor_id=service.doctor_id,
+            date=availability.date,
+            start_time=availability.start_time,
+            end_time=availability.end_time,
+        )
+
+        availability.doctor_id = service.doctor_id
+        availability.is_available = False
+        availability.save(force_insert=True)
+
+        appointment.doctor_id = service.doctor_id
+        appointment.availability = availability
+        appointment.insert_claimed()
+
+    return appointment
@@ -0,0 +1,110 @@
+# appointments/cache.py
+"""
+Versioned cache keys for slot lists.
+
+Each doctor-day has a version counter. Slot lists are cached under a key that
+embeds the current version, so bumping the counter after a booking or a
+cancellation makes every cached list for that day unreachable at once.
+
+Bumps only reach other workers through a shared cache (Redis). Under the
+per-process LocMem fallback a worker keeps serving its own list after
+another worker's booking, so APPOINTMENT_SLOT_CACHE_TIMEOUT defaults to a
+few seconds there instead of ten minutes. A stale list never double-books:
+the claim itself is a compare-and-swap in the database.
+
+Each doctor also has a schedule version: the time (ms) of the last change to
+any of their appointments, used by the calendar feed as ETag/Last-Modified.
+It expires after APPOINTMENT_ICS_CACHE_TIMEOUT and is then re-seeded with the
+current time, which bounds how long a worker that missed a bump (LocMem: a
+minute) keeps answering 304 with the old schedule.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+STATS_HITS_KEY = "slots:stats:hits"
+STATS_MISSES_KEY = "slots:stats:misses"
+
+
+def _version_key(doctor_id, date) -> str:
+    return f"slots:ver:{doctor_id}:{date.isoformat()}"
+
+
+def _initial_version() -> int:
+    # Time-based so a version key that was evicted never restarts below a
+    # version some stale slot list is still cached under.
+    return int(time.time() * 1000)
+
+
+def _incr(key: str) -> int:
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Missing key: seed it. If another worker won the race, increment theirs.
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def get_day_version(doctor_id, date) -> int:
+    key = _version_key(doctor_id, date)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_day_version(doctor_id, date) -> None:
+    key = _version_key(doctor_id, date)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+
+
+def _schedule_key(doctor_id) -> str:
+    return f"schedule:ver:{doctor_id}"
+
+
+def get_schedule_version(doctor_id) -> int:
+    key = _schedule_key(doctor_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=settings.APPOINTMENT_ICS_CACHE_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def bump_schedule_version(doctor_id) -> None:
+    # A fresh timestamp, never at or below the previous one
+    key = _schedule_key(doctor_id)
+    current = cache.get(key) or 0
+    cache.set(key, max(_initial_version(), current + 1), timeout=settings.APPOINTMENT_ICS_CACHE_TIMEOUT)
+
+
+def slots_key(doctor_id, service_id, duration, date) -> str:
+    version = get_day_version(doctor_id, date)
+    return f"slots:{doctor_id}:{service_id}:{duration}:{date.isoformat()}:v{version}"
+
+
+def get_slots(key):
+    value = cache.get(key)
+    _incr(STATS_MISSES_KEY if value is None else STATS_HITS_KEY)
+    return value
+
+
+def set_slots(key, value) -> None:
+    cache.set(key, value, timeout=settings.APPOINTMENT_SLOT_CACHE_TIMEOUT)
+
+
+def stats() -> dict:
+    hits = cache.get(STATS_HITS_KEY) or 0
+    misses = cache.get(STATS_MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": (hits / total) if total else 0.0,
+    }
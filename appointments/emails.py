@@ -1,9 +1,11 @@
 # appointments/emails.py
 import logging
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 
+from core import metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,6 +48,7 @@ def send_booking_emails(appointment) -> None:
             )
             msg1.attach_alternative(patient_html, "text/html")
             msg1.send(fail_silently=False)
+            metrics.inc("booking_emails_total", outcome="sent")
 
         # -------------------------
         # Doctor email
@@ -74,7 +77,48 @@ def send_booking_emails(appointment) -> None:
             )
             msg2.attach_alternative(doctor_html, "text/html")
             msg2.send(fail_silently=False)
+            metrics.inc("booking_emails_total", outcome="sent")
 
     except Exception:
         # IMPORTANT: don't break the booking flow
-        logger.exception("Failed sending booking emails for appointment_id=%s", appointment.id)
\ No newline at end of file
+        metrics.inc("booking_emails_total", outcome="failed")
+        logger.exception("Failed sending booking emails for appointment_id=%s", appointment.id)
+
+
+def send_status_emails(appointments) -> None:
+    """
+    Tell patients their appointment was confirmed, cancelled or completed.
+    All messages go out over a single connection.
+
+    Status changes should NEVER crash if email fails.
+    """
+    try:
+        messages = []
+        for appointment in appointments:
+            patient_to = _clean_recipients([getattr(appointment, "patient_email", "")])
+            if not patient_to:
+                continue
+
+            ctx = {"a": appointment}
+            msg = EmailMultiAlternatives(
+                subject=f"Appointment {appointment.get_status_display().lower()} — Dr Olaosebikan",
+                body=render_to_string("appointments/emails/patient_status.txt", ctx),
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=patient_to,
+                reply_to=_clean_recipients([getattr(settings, "DOCTOR_NOTIFICATION_EMAIL", "")]),
+            )
+            msg.attach_alternative(
+                render_to_string("appointments/emails/patient_status.html", ctx),
+                "text/html",
+            )
+            messages.append(msg)
+
+        if messages:
+            get_connection(fail_silently=False).send_messages(messages)
+
+    except Exception:
+        # IMPORTANT: don't break the status workflow
+        logger.exception(
+            "Failed sending status emails for appointment_ids=%s",
+            [a.id for a in appointments],
+        )
@@ -0,0 +1,90 @@
+# appointments/exports.py
+"""
+Streaming CSV export of a doctor's appointments.
+
+Rows are read with QuerySet.iterator(chunk_size=...) (a server-side cursor on
+PostgreSQL) and written one line at a time, so memory stays flat however
+much history is exported.
+
+Patient-typed cells are escaped against formula injection: spreadsheets run
+a cell starting with =, +, -, @, tab or CR as a formula, so those get a
+leading apostrophe.
+"""
+import csv
+
+from .models import Appointment
+
+EXPORT_CHUNK_SIZE = 2000
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+HEADER = [
+    "id",
+    "created_at",
+    "date",
+    "start_time",
+    "end_time",
+    "status",
+    "service",
+    "patient_name",
+    "patient_email",
+    "patient_phone",
+    "notes",
+]
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(*, doctor, date_from=None, date_to=None, status=None):
+    qs = (
+        Appointment.objects.filter(doctor=doctor)
+        .select_related("service", "availability")
+        .only(
+            "id",
+            "created_at",
+            "status",
+            "patient_name",
+            "patient_email",
+            "patient_phone",
+            "notes",
+            "service__name",
+            "availability__date",
+            "availability__start_time",
+            "availability__end_time",
+        )
+        .order_by("availability__date", "availability__start_time", "id")
+    )
+    if date_from:
+        qs = qs.filter(availability__date__gte=date_from)
+    if date_to:
+        qs = qs.filter(availability__date__lte=date_to)
+    if status:
+        qs = qs.filter(status=status)
+    return qs
+
+
+def escape_cell(value: str) -> str:
+    return f"'{value}" if value.startswith(FORMULA_PREFIXES) else value
+
+
+def iter_csv_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    writer = csv.writer(Echo())
+    yield writer.writerow(HEADER)
+    for a in queryset.iterator(chunk_size=chunk_size):
+        yield writer.writerow([
+            a.pk,
+            a.created_at.isoformat(),
+            a.availability.date.isoformat(),
+            a.availability.start_time.strftime("%H:%M"),
+            a.availability.end_time.strftime("%H:%M"),
+            a.status,
+            a.service.name,
+            escape_cell(a.patient_name),
+            escape_cell(a.patient_email),
+            escape_cell(a.patient_phone),
+            escape_cell(a.notes),
+        ])
@@ -2,9 +2,12 @@
 from django import forms
 from django.utils import timezone
 
+from . import holds
+from .booking import book_appointment
 from .models import Appointment, Availability, Service
 from .utils import (
-    generate_or_get_availabilities,
+    find_next_available_slots,
+    get_cached_slots,
     validate_booking_window,
     validate_not_in_past,
 )
@@ -31,6 +34,7 @@ class AppointmentCreateForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         self.doctor = kwargs.pop("doctor", None)  # we pass doctor from the view
+        self.hold_token = kwargs.pop("hold_token", None)  # the session's own hold
         super().__init__(*args, **kwargs)
 
         base = "mt-1 w-full rounded-lg border-gray-300 focus:border-blue-600 focus:ring-blue-600"
@@ -59,14 +63,15 @@ class AppointmentCreateForm(forms.ModelForm):
                 chosen_date = forms.DateField().to_python(date_val)
                 validate_booking_window(chosen_date)
 
-                qs = generate_or_get_availabilities(
-                    doctor=doctor,
-                    service=service,
+                slots = holds.exclude_held(
+                    get_cached_slots(doctor=doctor, service=service, date=chosen_date),
+                    doctor_id=doctor.pk,
                     date=chosen_date,
+                    token=self.hold_token,
                 )
                 self.fields["start_time"].choices += [
                     (a.start_time.strftime("%H:%M"), f"{a.start_time.strftime('%H:%M')} - {a.end_time.strftime('%H:%M')}")
-                    for a in qs
+                    for a in slots
                 ]
             except Exception:
                 # keep base choices
@@ -99,15 +104,32 @@ class AppointmentCreateForm(forms.ModelForm):
         except ValueError as e:
             raise forms.ValidationError(str(e))
 
-        # ensure the Availability exists & is available
+        # ensure the slot is still free in the day bitmap
         doctor = service.doctor
-        qs = generate_or_get_availabilities(doctor=doctor, service=service, date=date)
+        slots = get_cached_slots(doctor=doctor, service=service, date=date)
 
-        availability = qs.filter(start_time=start_time).first()
-        if not availability:
+        slot = next((s for s in slots if s.start_time == start_time), None)
+        if not slot:
             raise forms.ValidationError("That time slot is no longer available. Please pick another time.")
 
-        cleaned["availability_obj"] = availability
+        # respect other patients' temporary holds
+        if not holds.exclude_held(
+            [slot],
+            doctor_id=doctor.pk,
+            date=date,
+            token=self.hold_token,
+        ):
+            raise forms.ValidationError(
+                "Someone else is booking that time right now. Please pick another time."
+            )
+
+        # Unsaved: Appointment.save() persists it and claims the minutes
+        cleaned["availability_obj"] = Availability(
+            doctor=doctor,
+            date=date,
+            start_time=slot.start_time,
+            end_time=slot.end_time,
+        )
         return cleaned
 
     def save(self, commit=True):
@@ -119,5 +141,118 @@ class AppointmentCreateForm(forms.ModelForm):
         obj.availability = self.cleaned_data["availability_obj"]
 
         if commit:
-            obj.save()
+            # Optimistic path: raises SlotUnavailableError if someone else won the slot
+            book_appointment(obj)
         return obj
+
+
+
+class NextAvailableSlotsForm(forms.Form):
+    """
+    Query-string form for GET /appointments/slots/next/.
+    """
+    WEEKDAY_CHOICES = [
+        (0, "Monday"),
+        (1, "Tuesday"),
+        (2, "Wednesday"),
+        (3, "Thursday"),
+        (4, "Friday"),
+        (5, "Saturday"),
+        (6, "Sunday"),
+    ]
+
+    service = forms.ModelChoiceField(
+        queryset=Service.objects.filter(is_active=True).only("id", "doctor_id", "duration_minutes")
+    )
+    limit = forms.IntegerField(min_value=1, max_value=20, required=False)
+    weekday = forms.TypedMultipleChoiceField(choices=WEEKDAY_CHOICES, coerce=int, required=False)
+    after = forms.TimeField(required=False, input_formats=["%H:%M"])
+    before = forms.TimeField(required=False, input_formats=["%H:%M"])
+
+    def clean(self):
+        cleaned = super().clean()
+        after = cleaned.get("after")
+        before = cleaned.get("before")
+        if after and before and after >= before:
+            raise forms.ValidationError("'after' must be earlier than 'before'.")
+        return cleaned
+
+    def get_slots(self, held=None):
+        data = self.cleaned_data
+        return find_next_available_slots(
+            service=data["service"],
+            limit=data.get("limit") or 5,
+            weekdays=data.get("weekday"),
+            after=data.get("after"),
+            before=data.get("before"),
+            held=held,
+        )
+
+
+class MonthAvailabilityForm(forms.Form):
+    """
+    Query-string form for GET /appointments/slots/month/.
+    """
+    service = forms.ModelChoiceField(
+        queryset=Service.objects.filter(is_active=True).only("id", "doctor_id", "duration_minutes")
+    )
+    month = forms.DateField(input_formats=["%Y-%m"], help_text="YYYY-MM")
+
+
+class AppointmentExportForm(forms.Form):
+    """
+    Query-string form for GET /appointments/doctor/export/.
+    All filters are optional; dates match the appointment day.
+    """
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    status = forms.ChoiceField(
+        required=False,
+        choices=[("", "Any status")] + list(Appointment.STATUS_CHOICES),
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        date_from = cleaned.get("date_from")
+        date_to = cleaned.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("The start date must be before the end date.")
+        return cleaned
+
+
+class BulkStatusForm(forms.Form):
+    """
+    POST body for the doctor bulk action: action=confirm|cancel&ids=1&ids=2...
+    """
+    MAX_IDS = 200
+
+    ACTION_CHOICES = [
+        ("confirm", "Confirm"),
+        ("cancel", "Cancel"),
+    ]
+    ACTION_STATUS = {
+        "confirm": Appointment.STATUS_CONFIRMED,
+        "cancel": Appointment.STATUS_CANCELLED,
+    }
+
+    action = forms.ChoiceField(choices=ACTION_CHOICES)
+    ids = forms.Field(
+        widget=forms.MultipleHiddenInput,
+        error_messages={"required": "Select at least one appointment."},
+    )
+
+    def clean_ids(self):
+        raw = self.cleaned_data.get("ids") or []
+        try:
+            ids = {int(v) for v in raw}
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Invalid appointment id.")
+        if not ids:
+            raise forms.ValidationError("Select at least one appointment.")
+        if len(ids) > self.MAX_IDS:
+            raise forms.ValidationError(f"You can update at most {self.MAX_IDS} appointments at once.")
+        return ids
+
+    @property
+    def target_status(self):
+        return self.ACTION_STATUS[self.cleaned_data["action"]]
@@ -0,0 +1,155 @@
+# appointments/holds.py
+"""
+Short-lived slot holds kept in the cache.
+
+When a patient selects a time, the minutes of that slot are held for
+APPOINTMENT_SLOT_HOLD_SECONDS under a random token. Holds are stored as one
+cache key per 5-minute bucket and acquired with cache.add(), so two patients
+can never hold overlapping minutes. Keys simply expire; nothing in the
+database needs sweeping.
+
+The token lives in the patient's session (never taken from the request
+body), and each session and each client IP has at most one live hold: a new
+hold releases the previous one. Hold requests are also rate-limited per IP
+(APPOINTMENT_HOLD_RATE_LIMIT per minute), so a script cannot hold the
+booking window.
+"""
+import secrets
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import bitmap
+from .utils import day_bounds
+
+BUCKET_MINUTES = 5
+SESSION_KEY = "appointments_hold_token"
+RATE_WINDOW_SECONDS = 60
+
+
+def _bucket_key(doctor_id, date, bucket) -> str:
+    return f"slots:hold:{doctor_id}:{date.isoformat()}:{bucket}"
+
+
+def _token_key(token) -> str:
+    return f"slots:holdtoken:{token}"
+
+
+def _owner_key(owner) -> str:
+    return f"slots:holdowner:{owner}"
+
+
+def _buckets(start: int, end: int) -> range:
+    # Conservative: every bucket the span touches
+    return range(start // BUCKET_MINUTES, -(-end // BUCKET_MINUTES))
+
+
+def _release_token(token) -> None:
+    held = cache.get(_token_key(token))
+    if not held:
+        return
+    doctor_id, date, start, end = held
+    keys = [_bucket_key(doctor_id, date, b) for b in _buckets(start, end)]
+    owned = [key for key, value in cache.get_many(keys).items() if value == token]
+    if owned:
+        cache.delete_many(owned)
+    cache.delete(_token_key(token))
+
+
+def session_token(request, create=False):
+    """The session's hold token; issued (and the session saved) if `create`."""
+    token = request.session.get(SESSION_KEY)
+    if token is None and create:
+        token = request.session[SESSION_KEY] = secrets.token_urlsafe(16)
+    return token
+
+
+def client_ip(request) -> str:
+    # Behind the proxy the client is the address it appended last
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    return forwarded.split(",")[-1].strip() or request.META.get("REMOTE_ADDR", "")
+
+
+def allow_request(ip) -> bool:
+    """Count a hold request for this IP; False past the per-minute limit."""
+    window = int(time.time() // RATE_WINDOW_SECONDS)
+    key = f"slots:holdrate:{ip}:{window}"
+    cache.add(key, 0, timeout=RATE_WINDOW_SECONDS)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        return True
+    return count <= settings.APPOINTMENT_HOLD_RATE_LIMIT
+
+
+def place_hold(*, doctor_id, date, start_time, end_time, token=None, owner=None):
+    """
+    Hold the slot for this token (a new one is issued if missing).
+    Any previous hold of the same token, or of another token placed by the
+    same `owner` (client IP), is released first.
+    Returns the token, or None if somebody else holds part of the slot.
+    """
+    token = token or secrets.token_urlsafe(16)
+    timeout = settings.APPOINTMENT_SLOT_HOLD_SECONDS
+    start = bitmap.minute_of_day(start_time)
+    end = bitmap.minute_of_day(end_time)
+
+    _release_token(token)
+    if owner:
+        previous = cache.get(_owner_key(owner))
+        if previous and previous != token:
+            _release_token(previous)
+
+    acquired = []
+    for bucket in _buckets(start, end):
+        key = _bucket_key(doctor_id, date, bucket)
+        if cache.add(key, token, timeout=timeout) or cache.get(key) == token:
+            acquired.append(key)
+            continue
+        # Somebody else holds an overlapping bucket: give back what we took
+        cache.delete_many(acquired)
+        return None
+
+    cache.set(_token_key(token), (doctor_id, date, start, end), timeout=timeout)
+    if owner:
+        cache.set(_owner_key(owner), token, timeout=timeout)
+    return token
+
+
+def release_hold(token) -> None:
+    if token:
+        _release_token(token)
+
+
+def held_masks(*, doctor_id, dates, token=None) -> dict:
+    """{date: minute bitmap held by anyone other than `token`} in one cache read."""
+    day_start, day_end = day_bounds()
+    buckets = list(_buckets(day_start, day_end))
+    keys = {(date, b): _bucket_key(doctor_id, date, b) for date in dates for b in buckets}
+    values = cache.get_many(list(keys.values()))
+
+    masks = {}
+    for (date, bucket), key in keys.items():
+        value = values.get(key)
+        if value is not None and value != token:
+            start = bucket * BUCKET_MINUTES
+            masks[date] = masks.get(date, 0) | bitmap.span_mask(start, start + BUCKET_MINUTES)
+    return masks
+
+
+def held_mask(*, doctor_id, date, token=None) -> int:
+    """Minute bitmap of the day's buckets held by anyone other than `token`."""
+    return held_masks(doctor_id=doctor_id, dates=[date], token=token).get(date, 0)
+
+
+def exclude_held(slots, *, doctor_id, date, token=None):
+    """Drop slots that overlap another patient's hold."""
+    mask = held_mask(doctor_id=doctor_id, date=date, token=token)
+    if not mask:
+        return list(slots)
+    return [
+        s for s in slots
+        if bitmap.is_free(mask, bitmap.minute_of_day(s.start_time), bitmap.minute_of_day(s.end_time))
+    ]
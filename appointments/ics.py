@@ -0,0 +1,141 @@
+# appointments/ics.py
+"""
+Per-doctor iCalendar feed of pending and confirmed appointments.
+
+Calendar apps cannot log in, so the feed URL carries the doctor's random
+CalendarFeed token; regenerating it revokes the old URL. The rendered feed is
+cached under the doctor's schedule version
+(appointments.cache.get_schedule_version) and the day, which also provide the
+ETag and Last-Modified: an unchanged schedule is answered 304 from the cache
+alone. Without a shared cache both expire after a minute (see
+APPOINTMENT_ICS_CACHE_TIMEOUT), so other workers catch up with a change.
+"""
+from datetime import timedelta, timezone as dt_timezone
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Appointment, CalendarFeed
+from .utils import _combine_local
+
+FEED_CHUNK_SIZE = 500
+# Keep recent history so just-finished appointments don't vanish mid-day
+FEED_PAST_DAYS = 7
+
+
+def feed_token(doctor_id) -> str:
+    """The doctor's current feed token, issued on first use."""
+    feed, _ = CalendarFeed.objects.get_or_create(doctor_id=doctor_id)
+    return feed.token
+
+
+def regenerate_feed_token(doctor_id) -> str:
+    feed, created = CalendarFeed.objects.get_or_create(doctor_id=doctor_id)
+    if not created:
+        feed.regenerate()
+    return feed.token
+
+
+def doctor_id_from_token(token):
+    """Return the doctor id the token was issued for, or None."""
+    return CalendarFeed.objects.filter(token=token).values_list("doctor_id", flat=True).first()
+
+
+def feed_key(doctor_id, version, day) -> str:
+    return f"ics:{doctor_id}:v{version}:{day.isoformat()}"
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    # RFC 5545: lines longer than 75 octets continue with a leading space
+    raw = line.encode()
+    if len(raw) <= 75:
+        return line
+    parts = []
+    while raw:
+        size = 75 if not parts else 74
+        # don't split a UTF-8 sequence
+        while size < len(raw) and (raw[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(raw[:size].decode())
+        raw = raw[size:]
+    return "\r\n ".join(parts)
+
+
+def _utc(dt) -> str:
+    return dt.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def iter_feed_lines(doctor_id):
+    yield "BEGIN:VCALENDAR"
+    yield "VERSION:2.0"
+    yield "PRODID:-//Dr Olaosebikan Clinic//Appointments//EN"
+    yield "CALSCALE:GREGORIAN"
+    yield "X-WR-CALNAME:Clinic appointments"
+
+    appointments = (
+        Appointment.objects.filter(
+            doctor_id=doctor_id,
+            status__in=[Appointment.STATUS_PENDING, Appointment.STATUS_CONFIRMED],
+            availability__date__gte=timezone.localdate() - timedelta(days=FEED_PAST_DAYS),
+        )
+        .select_related("service", "availability")
+        .only(
+            "id",
+            "status",
+            "created_at",
+            "patient_name",
+            "patient_phone",
+            "notes",
+            "service__name",
+            "availability__date",
+            "availability__start_time",
+            "availability__end_time",
+        )
+        .order_by("availability__date", "availability__start_time")
+    )
+    domain = urlparse(settings.SITE_URL).hostname
+
+    for a in appointments.iterator(chunk_size=FEED_CHUNK_SIZE):
+        slot = a.availability
+        description = f"Patient: {a.patient_name}"
+        if a.patient_phone:
+            description += f"\nPhone: {a.patient_phone}"
+        if a.notes:
+            description += f"\nNotes: {a.notes}"
+
+        yield "BEGIN:VEVENT"
+        yield f"UID:appointment-{a.pk}@{domain}"
+        yield f"DTSTAMP:{_utc(a.created_at)}"
+        yield f"DTSTART:{_utc(_combine_local(slot.date, slot.start_time))}"
+        yield f"DTEND:{_utc(_combine_local(slot.date, slot.end_time))}"
+        yield f"SUMMARY:{_escape(f'{a.service.name} – {a.patient_name}')}"
+        yield f"DESCRIPTION:{_escape(description)}"
+        yield "STATUS:" + ("CONFIRMED" if a.status == Appointment.STATUS_CONFIRMED else "TENTATIVE")
+        yield "END:VEVENT"
+
+    yield "END:VCALENDAR"
+
+
+def render_feed(doctor_id, version) -> str:
+    """
+    The feed body for this schedule version, rendered at most once per
+    version and day (the FEED_PAST_DAYS window moves at midnight).
+    """
+    key = feed_key(doctor_id, version, timezone.localdate())
+    body = cache.get(key)
+    if body is None:
+        body = "".join(_fold(line) + "\r\n" for line in iter_feed_lines(doctor_id))
+        cache.set(key, body, timeout=settings.APPOINTMENT_ICS_CACHE_TIMEOUT)
+    return body
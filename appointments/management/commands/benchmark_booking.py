@@ -0,0 +1,148 @@
+# appointments/management/commands/benchmark_booking.py
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from appointments.booking import book_appointment
+from appointments.models import Appointment, Availability, DayAvailability, Service, SlotUnavailableError
+from appointments.utils import day_bounds
+from appointments import bitmap
+
+User = get_user_model()
+
+
+def book_locked(appointment: Appointment) -> Appointment:
+    """
+    Pessimistic baseline: lock the day row with SELECT ... FOR UPDATE, check
+    and set the minutes, then insert the rows while holding the lock.
+    """
+    availability = appointment.availability
+    doctor_id = appointment.service.doctor_id
+    mask = DayAvailability._mask(availability.start_time, availability.end_time)
+
+    with transaction.atomic():
+        day = DayAvailability.objects.select_for_update().get(doctor_id=doctor_id, date=availability.date)
+        if day.bitmap & mask:
+            raise SlotUnavailableError("This time slot is no longer available.")
+        DayAvailability.objects.filter(pk=day.pk).update(
+            occupancy=bitmap.to_bytes(day.bitmap | mask),
+            version=F("version") + 1,
+        )
+
+        availability.doctor_id = doctor_id
+        availability.is_available = False
+        availability.save(force_insert=True)
+
+        appointment.doctor_id = doctor_id
+        appointment.availability = availability
+        appointment.insert_claimed()
+    return appointment
+
+
+class Command(BaseCommand):
+    help = (
+        "Threaded contention benchmark: many threads race for the same few slots "
+        "through a SELECT ... FOR UPDATE baseline that locks the day row, and "
+        "through the optimistic (compare-and-swap) booking path. "
+        "Creates a throwaway doctor/service and removes everything afterwards. "
+        "Run against a dev database (PostgreSQL recommended; SQLite serializes writers)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--attempts", type=int, default=50, help="Booking attempts per thread.")
+        parser.add_argument("--slots", type=int, default=10, help="Distinct slots the threads compete for.")
+        parser.add_argument(
+            "--path",
+            choices=["locked", "optimistic", "both"],
+            default="both",
+        )
+
+    def handle(self, *args, **options):
+        paths = ["locked", "optimistic"] if options["path"] == "both" else [options["path"]]
+
+        doctor = User.objects.create_user(
+            username=f"bench-{uuid.uuid4().hex[:8]}",
+            password=uuid.uuid4().hex,
+            role=User.ROLE_DOCTOR,
+        )
+        service = Service.objects.create(doctor=doctor, name="Benchmark", duration_minutes=15)
+
+        try:
+            self.stdout.write(f"{'path':<12}{'attempts':>10}{'booked':>8}{'conflicts':>11}{'errors':>8}{'secs':>8}{'ops/s':>9}")
+            for index, path in enumerate(paths):
+                # Each path gets its own day so both start from an empty bitmap
+                date = timezone.localdate() + timedelta(days=index + 1)
+                result = self._run(path, service, date, options)
+                self.stdout.write(
+                    f"{path:<12}{result['attempts']:>10}{result['booked']:>8}{result['conflicts']:>11}"
+                    f"{result['errors']:>8}{result['elapsed']:>8.2f}{result['attempts'] / result['elapsed']:>9.1f}"
+                )
+        finally:
+            Appointment.objects.filter(doctor=doctor).delete()
+            Availability.objects.filter(doctor=doctor).delete()
+            DayAvailability.objects.filter(doctor=doctor).delete()
+            service.delete()
+            doctor.delete()
+
+    def _run(self, path, service, date, options):
+        day_start, _ = day_bounds()
+        slots = [
+            (bitmap.time_of_minute(day_start + i * 15), bitmap.time_of_minute(day_start + (i + 1) * 15))
+            for i in range(options["slots"])
+        ]
+        counters = {"attempts": 0, "booked": 0, "conflicts": 0, "errors": 0}
+        lock = threading.Lock()
+        # The locked path needs the row to exist before threads lock it
+        DayAvailability.objects.get_or_create(doctor=service.doctor, date=date)
+
+        def worker():
+            local = {"attempts": 0, "booked": 0, "conflicts": 0, "errors": 0}
+            try:
+                for _ in range(options["attempts"]):
+                    start_time, end_time = random.choice(slots)
+                    appointment = Appointment(
+                        service=service,
+                        availability=Availability(
+                            doctor=service.doctor,
+                            date=date,
+                            start_time=start_time,
+                            end_time=end_time,
+                        ),
+                        patient_name="Benchmark",
+                        patient_email="bench@example.com",
+                    )
+                    local["attempts"] += 1
+                    try:
+                        if path == "optimistic":
+                            book_appointment(appointment)
+                        else:
+                            book_locked(appointment)
+                        local["booked"] += 1
+                    except ValidationError:
+                        local["conflicts"] += 1
+                    except DatabaseError:
+                        local["errors"] += 1
+            finally:
+                connection.close()
+                with lock:
+                    for key, value in local.items():
+                        counters[key] += value
+
+        threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        counters["elapsed"] = max(time.perf_counter() - started, 1e-9)
+        return counters
@@ -0,0 +1,33 @@
+# appointments/management/commands/generate_availability.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from appointments.utils import generate_availabilities
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-materialize DayAvailability rows for the whole booking window. "
+        "Run daily (cron / scheduled job) so slot lookups stay read-only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.APPOINTMENT_LOOKAHEAD_DAYS,
+            help="Number of days ahead to generate (default: APPOINTMENT_LOOKAHEAD_DAYS).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Rows per bulk insert.",
+        )
+
+    def handle(self, *args, **options):
+        created = generate_availabilities(
+            days=options["days"],
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Created {created} day availability row(s)."))
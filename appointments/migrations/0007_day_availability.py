@@ -0,0 +1,75 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from appointments import bitmap
+
+
+def build_day_bitmaps(apps, schema_editor):
+    """
+    Fold booked Availability rows into per-day bitmaps and drop the
+    pre-materialized free rows that no appointment references.
+    """
+    Availability = apps.get_model("appointments", "Availability")
+    DayAvailability = apps.get_model("appointments", "DayAvailability")
+
+    days = {}
+    booked = (
+        Availability.objects
+        .filter(is_available=False)
+        .values_list("doctor_id", "date", "start_time", "end_time")
+        .iterator(chunk_size=2000)
+    )
+    for doctor_id, date, start_time, end_time in booked:
+        key = (doctor_id, date)
+        days[key] = days.get(key, 0) | bitmap.span_mask(
+            bitmap.minute_of_day(start_time),
+            bitmap.minute_of_day(end_time),
+        )
+
+    DayAvailability.objects.bulk_create(
+        [
+            DayAvailability(doctor_id=doctor_id, date=date, occupancy=bitmap.to_bytes(value))
+            for (doctor_id, date), value in days.items()
+        ],
+        batch_size=1000,
+    )
+
+    Availability.objects.filter(is_available=True, appointment__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_service_icon'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DayAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('occupancy', models.BinaryField(default=bitmap.empty_bitmap)),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='availability',
+            name='unique_doctor_time_slot',
+        ),
+        migrations.AddField(
+            model_name='dayavailability',
+            name='doctor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_availabilities', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='dayavailability',
+            constraint=models.UniqueConstraint(fields=('doctor', 'date'), name='unique_doctor_day'),
+        ),
+        migrations.RunPython(build_day_bitmaps, migrations.RunPython.noop),
+    ]
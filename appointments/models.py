@@ -1,10 +1,24 @@
+import secrets
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
+from django.db.models import F
 from django.contrib.auth import get_user_model
 
+from . import bitmap
+from . import cache as slot_cache
+
 User = get_user_model()
 
+# How many times a bitmap compare-and-swap is retried when another booking
+# on the same day wins the race for the row version.
+BITMAP_CAS_RETRIES = 5
+
+
+class SlotUnavailableError(ValidationError):
+    """Raised when the requested minutes are already booked."""
+
 class Service(models.Model):
     doctor = models.ForeignKey(
         User,
@@ -40,7 +54,98 @@ class Service(models.Model):
         return self.name
 
 
+class DayAvailability(models.Model):
+    """
+    One row per doctor per day holding a minute-granular occupancy bitmap.
+    Free slots for any service duration are computed in memory from it.
+    """
+    doctor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="day_availabilities"
+    )
+    date = models.DateField()
+    occupancy = models.BinaryField(default=bitmap.empty_bitmap)
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doctor", "date"],
+                name="unique_doctor_day"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.doctor_id} – {self.date}"
+
+    @property
+    def bitmap(self) -> int:
+        return bitmap.to_int(self.occupancy)
+
+    @classmethod
+    def _swap(cls, *, doctor_id, date, mask, claim):
+        for _ in range(BITMAP_CAS_RETRIES):
+            day, _ = cls.objects.get_or_create(doctor_id=doctor_id, date=date)
+            current = day.bitmap
+
+            if claim:
+                if current & mask:
+                    raise SlotUnavailableError("This time slot is no longer available.")
+                new = current | mask
+            else:
+                new = current & ~mask
+
+            # Single conditional UPDATE: only wins if nobody touched the day since we read it.
+            updated = cls.objects.filter(pk=day.pk, version=day.version).update(
+                occupancy=bitmap.to_bytes(new),
+                version=F("version") + 1,
+            )
+            if updated:
+                # Invalidate cached slot lists once the new bitmap is visible
+                transaction.on_commit(
+                    lambda: slot_cache.bump_day_version(doctor_id, date)
+                )
+                return
+        raise SlotUnavailableError("This time slot is busy right now. Please try again.")
+
+    @staticmethod
+    def _mask(start_time, end_time) -> int:
+        return bitmap.span_mask(
+            bitmap.minute_of_day(start_time),
+            bitmap.minute_of_day(end_time),
+        )
+
+    @classmethod
+    def claim(cls, *, doctor_id, date, start_time, end_time):
+        cls._swap(
+            doctor_id=doctor_id,
+            date=date,
+            mask=cls._mask(start_time, end_time),
+            claim=True,
+        )
+
+    @classmethod
+    def release(cls, *, doctor_id, date, start_time, end_time):
+        cls.release_spans(doctor_id=doctor_id, date=date, spans=[(start_time, end_time)])
+
+    @classmethod
+    def release_spans(cls, *, doctor_id, date, spans):
+        """Release several (start_time, end_time) spans of one day in a single swap."""
+        mask = 0
+        for start_time, end_time in spans:
+            mask |= cls._mask(start_time, end_time)
+        cls._swap(doctor_id=doctor_id, date=date, mask=mask, claim=False)
+
+
 class Availability(models.Model):
+    """
+    Booked time slot referenced by an Appointment.
+
+    Rows are created at booking time only; which minutes are free is tracked
+    by DayAvailability.
+    """
     doctor = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -53,12 +158,6 @@ class Availability(models.Model):
 
     class Meta:
         ordering = ["date", "start_time"]
-        constraints = [
-            models.UniqueConstraint(
-                fields=["doctor", "date", "start_time", "end_time"],
-                name="unique_doctor_time_slot"
-            )
-        ]
         indexes = [
             models.Index(fields=["doctor", "date"]),
         ]
@@ -87,6 +186,13 @@ class Appointment(models.Model):
         (STATUS_COMPLETED, "Completed"),
     ]
 
+    # Statuses that keep the slot occupied
+    LOCKED_STATUSES = {
+        STATUS_PENDING,
+        STATUS_CONFIRMED,
+        STATUS_COMPLETED,
+    }
+
     # --------------------
     # Relations
     # --------------------
@@ -140,6 +246,9 @@ class Appointment(models.Model):
         indexes = [
             models.Index(fields=["doctor", "status"]),
             models.Index(fields=["patient_email"]),
+            # Keyset pagination of the doctor and patient lists
+            models.Index(fields=["doctor", "-created_at", "-id"], name="appt_doctor_created_idx"),
+            models.Index(fields=["patient", "-created_at", "-id"], name="appt_patient_created_idx"),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -174,24 +283,76 @@ class Appointment(models.Model):
             self.doctor = self.service.doctor
 
         with transaction.atomic():
-            availability = (
-                Availability.objects
-                .select_for_update()
-                .get(pk=self.availability_id)
-            )
+            availability = self.availability
+            if availability.pk is None:
+                # Booking path: the slot row is created together with the appointment
+                availability.save()
+                self.availability = availability
+            else:
+                availability = Availability.objects.get(pk=availability.pk)
 
             self.full_clean()
             super().save(*args, **kwargs)
 
-            # Centralized locking rules
-            LOCKED_STATUSES = {
-                self.STATUS_PENDING,
-                self.STATUS_CONFIRMED,
-                self.STATUS_COMPLETED,
-            }
+            # Centralized locking rules: flip the row flag conditionally and only
+            # touch the day bitmap when the flag actually changed.
+            slot = Availability.objects.filter(pk=availability.pk)
+            if self.status in self.LOCKED_STATUSES:
+                if slot.filter(is_available=True).update(is_available=False):
+                    DayAvailability.claim(
+                        doctor_id=availability.doctor_id,
+                        date=availability.date,
+                        start_time=availability.start_time,
+                        end_time=availability.end_time,
+                    )
+            else:
+                if slot.filter(is_available=False).update(is_available=True):
+                    DayAvailability.release(
+                        doctor_id=availability.doctor_id,
+                        date=availability.date,
+                        start_time=availability.start_time,
+                        end_time=availability.end_time,
+                    )
 
-            availability.is_available = self.status not in LOCKED_STATUSES
-            availability.save(update_fields=["is_available"])
+            self._schedule_changed()
+
+    def insert_claimed(self):
+        """
+        Plain INSERT used by appointments.booking once the slot minutes are
+        already claimed: skips full_clean() and the locking logic in save().
+        """
+        super().save(force_insert=True)
+        self._schedule_changed()
+
+    def _schedule_changed(self):
+        # Calendar feed ETag/Last-Modified
+        doctor_id = self.doctor_id
+        transaction.on_commit(lambda: slot_cache.bump_schedule_version(doctor_id))
 
     def __str__(self):
         return f"{self.patient_name} – {self.service} ({self.status})"
+
+
+def new_feed_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+class CalendarFeed(models.Model):
+    """
+    Secret for a doctor's calendar feed URL. Regenerating it revokes every
+    URL handed out before.
+    """
+    doctor = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name="calendar_feed"
+    )
+    token = models.CharField(max_length=64, unique=True, default=new_feed_token)
+    issued_at = models.DateTimeField(auto_now=True)
+
+    def regenerate(self):
+        self.token = new_feed_token()
+        self.save(update_fields=["token", "issued_at"])
+
+    def __str__(self):
+        return f"Calendar feed for {self.doctor}"
@@ -0,0 +1,127 @@
+# appointments/pagination.py
+"""
+Keyset (cursor) pagination for appointment lists.
+
+Pages are walked on (created_at, id) instead of OFFSET, so every page is an
+index range scan of page_size + 1 rows, however deep it is. The cursor is the
+(created_at, id) of the last row shown, encoded into the ?cursor= parameter.
+
+The total is optional:
+  count_mode = "exact"        COUNT(*) on every request
+  count_mode = "approximate"  COUNT over at most approximate_count_limit rows,
+                              shown as "200+" beyond that
+  count_mode = None           no count at all
+"""
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+CURSOR_PARAM = "cursor"
+
+
+def encode_cursor(obj, direction: str = "next") -> str:
+    raw = f"{direction}|{obj.created_at.isoformat()}|{obj.pk}"
+    return urlsafe_base64_encode(raw.encode())
+
+
+def decode_cursor(value):
+    """Return (direction, created_at, pk), or None if the cursor is malformed."""
+    try:
+        direction, created_at, pk = force_str(urlsafe_base64_decode(value)).split("|")
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    if direction not in ("next", "prev") or created_at is None:
+        return None
+    return direction, created_at, pk
+
+
+def capped_count(queryset, limit):
+    """(count, capped): the count of at most `limit` rows, and whether there are more."""
+    count = queryset.order_by()[: limit + 1].count()
+    return min(count, limit), count > limit
+
+
+class KeysetPaginator:
+    """Stands in for Paginator in the template context: only `count`."""
+
+    def __init__(self, count=None, approximate=False):
+        self.count = count
+        self.approximate = approximate
+
+
+class KeysetPage:
+    def __init__(self, object_list, *, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin replacing the offset paginator with keyset pagination
+    on (-created_at, -id). Pair it with an index on (..., created_at, id).
+    """
+
+    count_mode = "approximate"
+    approximate_count_limit = 200
+
+    def get_total(self, queryset):
+        if self.count_mode == "exact":
+            return KeysetPaginator(queryset.order_by().count())
+        if self.count_mode == "approximate":
+            count, capped = capped_count(queryset, self.approximate_count_limit)
+            return KeysetPaginator(count, approximate=capped)
+        return KeysetPaginator()
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor = decode_cursor(self.request.GET.get(CURSOR_PARAM, ""))
+
+        if cursor is None:
+            rows = list(queryset.order_by("-created_at", "-id")[: page_size + 1])
+            has_more, has_before = len(rows) > page_size, False
+            rows = rows[:page_size]
+        else:
+            direction, created_at, pk = cursor
+            if direction == "next":
+                rows = list(
+                    queryset.filter(
+                        Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                    ).order_by("-created_at", "-id")[: page_size + 1]
+                )
+                has_more, has_before = len(rows) > page_size, True
+                rows = rows[:page_size]
+            else:
+                rows = list(
+                    queryset.filter(
+                        Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                    ).order_by("created_at", "id")[: page_size + 1]
+                )
+                has_more, has_before = True, len(rows) > page_size
+                rows = rows[:page_size][::-1]
+
+        page = KeysetPage(
+            rows,
+            paginator=self.get_total(queryset),
+            next_cursor=encode_cursor(rows[-1], "next") if rows and has_more else None,
+            previous_cursor=encode_cursor(rows[0], "prev") if rows and has_before else None,
+        )
+        return page.paginator, page, rows, page.has_other_pages()
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from . import cache as slot_cache
+from .models import Appointment
+
+
+@receiver(post_delete, sender=Appointment)
+def invalidate_schedule(sender, instance, **kwargs):
+    # Also sent for QuerySet.delete(), admin bulk deletes and cascades
+    doctor_id = instance.doctor_id
+    transaction.on_commit(lambda: slot_cache.bump_schedule_version(doctor_id))
@@ -1,8 +1,49 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+from datetime import time, timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.urls import reverse
 from django.utils import timezone
 
-from appointments.models import Appointment, Availability, Service
+from appointments.models import (
+    Appointment,
+    Availability,
+    DayAvailability,
+    Service,
+    SlotUnavailableError,
+)
+from core import metrics
+from appointments import cache as slot_cache
+from appointments import holds
+from appointments.admin import make_available
+from appointments.booking import book_appointment
+from appointments.forms import AppointmentCreateForm
+from appointments.utils import (
+    find_next_available_slots,
+    generate_availabilities,
+    get_available_slots,
+    get_cached_slots,
+    month_free_slot_counts,
+)
+from appointments.transitions import (
+    InvalidTransitionError,
+    bulk_transition,
+    transition_appointment,
+)
+from appointments.ics import feed_token
+from appointments.views import (
+    AppointmentExportView,
+    DoctorCalendarFeedView,
+    DoctorAppointmentListView,
+    MonthAvailabilityView,
+)
 
 User = get_user_model()
 
@@ -71,3 +112,907 @@ class AppointmentAvailabilityTest(TestCase):
         # Availability should unlock
         self.availability.refresh_from_db()
         self.assertTrue(self.availability.is_available)
+
+
+class DayAvailabilityBitmapTest(TestCase):
+    """
+    Free slots come from the per-day bitmap, so a booking blocks
+    overlapping slots for every service duration.
+    """
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.short = Service.objects.create(
+            doctor=self.doctor,
+            name="Follow-up",
+            duration_minutes=30,
+        )
+        self.long = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=60,
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def _book(self, service, start, end):
+        return Appointment.objects.create(
+            service=service,
+            availability=Availability(
+                doctor=self.doctor,
+                date=self.date,
+                start_time=start,
+                end_time=end,
+            ),
+            patient_name="Jane Doe",
+            patient_email="jane@example.com",
+        )
+
+    def test_booking_blocks_overlapping_slots_for_other_durations(self):
+        self._book(self.short, time(10, 0), time(10, 30))
+
+        short_starts = [
+            s.start_time for s in get_available_slots(
+                doctor=self.doctor, service=self.short, date=self.date
+            )
+        ]
+        long_starts = [
+            s.start_time for s in get_available_slots(
+                doctor=self.doctor, service=self.long, date=self.date
+            )
+        ]
+
+        self.assertNotIn(time(10, 0), short_starts)
+        self.assertIn(time(10, 30), short_starts)
+        self.assertNotIn(time(10, 0), long_starts)
+        self.assertIn(time(11, 0), long_starts)
+        self.assertEqual(DayAvailability.objects.filter(doctor=self.doctor).count(), 1)
+
+    def test_overlapping_booking_is_rejected(self):
+        self._book(self.long, time(10, 0), time(11, 0))
+
+        with self.assertRaises(SlotUnavailableError):
+            self._book(self.short, time(10, 30), time(11, 0))
+
+        self.assertEqual(Availability.objects.count(), 1)
+
+    def test_cancel_releases_minutes(self):
+        appointment = self._book(self.short, time(10, 0), time(10, 30))
+        appointment.status = Appointment.STATUS_CANCELLED
+        appointment.save()
+
+        day = DayAvailability.objects.get(doctor=self.doctor, date=self.date)
+        self.assertEqual(day.bitmap, 0)
+
+
+class GenerateAvailabilityTest(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+
+    def test_slot_lookup_does_not_write(self):
+        slots = get_available_slots(
+            doctor=self.doctor,
+            service=self.service,
+            date=timezone.localdate(),
+        )
+
+        self.assertEqual(slots[0].start_time, time(9, 0))
+        self.assertFalse(DayAvailability.objects.exists())
+
+    def test_generation_is_idempotent(self):
+        self.assertEqual(generate_availabilities(days=9, chunk_size=4), 10)
+        self.assertEqual(generate_availabilities(days=9, chunk_size=4), 0)
+        self.assertEqual(DayAvailability.objects.filter(doctor=self.doctor).count(), 10)
+
+
+class SlotCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def _starts(self):
+        return [
+            s.start_time for s in get_cached_slots(
+                doctor=self.doctor, service=self.service, date=self.date
+            )
+        ]
+
+    def test_second_lookup_is_served_from_cache(self):
+        self._starts()
+        with self.assertNumQueries(0):
+            self._starts()
+
+        stats = slot_cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_booking_and_cancel_invalidate_cached_slots(self):
+        self.assertIn(time(9, 0), self._starts())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(
+                service=self.service,
+                availability=Availability(
+                    doctor=self.doctor,
+                    date=self.date,
+                    start_time=time(9, 0),
+                    end_time=time(9, 30),
+                ),
+                patient_name="Jane Doe",
+                patient_email="jane@example.com",
+            )
+        self.assertNotIn(time(9, 0), self._starts())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = Appointment.STATUS_CANCELLED
+            appointment.save()
+        self.assertIn(time(9, 0), self._starts())
+
+
+class NextAvailableSlotsTest(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        self.tomorrow = timezone.localdate() + timedelta(days=1)
+        Appointment.objects.create(
+            service=self.service,
+            availability=Availability(
+                doctor=self.doctor,
+                date=self.tomorrow,
+                start_time=time(9, 0),
+                end_time=time(9, 30),
+            ),
+            patient_name="Jane Doe",
+            patient_email="jane@example.com",
+        )
+
+    def test_sweeps_window_in_one_query(self):
+        with self.assertNumQueries(1):
+            slots = find_next_available_slots(
+                service=self.service,
+                limit=3,
+                weekdays=[self.tomorrow.weekday()],
+                after=time(9, 0),
+                before=time(10, 0),
+            )
+
+        next_week = self.tomorrow + timedelta(days=7)
+        self.assertEqual(
+            [(s.date, s.start_time) for s in slots],
+            [
+                (self.tomorrow, time(9, 30)),
+                (next_week, time(9, 0)),
+                (next_week, time(9, 30)),
+            ],
+        )
+
+
+    def test_held_slots_are_skipped(self):
+        cache.clear()
+        holds.place_hold(
+            doctor_id=self.doctor.pk,
+            date=self.tomorrow,
+            start_time=time(9, 30),
+            end_time=time(10, 0),
+        )
+
+        response = self.client.get(
+            reverse("appointments:next_slots"),
+            {
+                "service": self.service.pk,
+                "limit": 1,
+                "weekday": self.tomorrow.weekday(),
+                "after": "09:00",
+                "before": "10:00",
+            },
+            HTTP_HOST="localhost:8000",
+        )
+
+        next_week = self.tomorrow + timedelta(days=7)
+        self.assertEqual(
+            [(s.date, s.start_time) for s in response.context["slots"]],
+            [(next_week, time(9, 0))],
+        )
+
+
+class MonthAvailabilityTest(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=60,
+        )
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.factory = RequestFactory()
+
+    def _get(self, **headers):
+        request = self.factory.get(
+            "/appointments/slots/month/",
+            {"service": self.service.pk, "month": self.day.strftime("%Y-%m")},
+            **headers,
+        )
+        request.session = {}
+        return MonthAvailabilityView.as_view()(request)
+
+    def test_counts_drop_after_booking(self):
+        before = month_free_slot_counts(service=self.service, year=self.day.year, month=self.day.month)
+
+        Appointment.objects.create(
+            service=self.service,
+            availability=Availability(
+                doctor=self.doctor,
+                date=self.day,
+                start_time=time(9, 0),
+                end_time=time(10, 0),
+            ),
+            patient_name="Jane Doe",
+            patient_email="jane@example.com",
+        )
+
+        after = month_free_slot_counts(service=self.service, year=self.day.year, month=self.day.month)
+        self.assertEqual(after[self.day], before[self.day] - 1)
+
+    def test_unchanged_month_returns_304(self):
+        first = self._get()
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(2):
+            second = self._get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+
+    def test_held_slots_are_not_counted(self):
+        cache.clear()
+        first = self._get()
+        free = json.loads(first.content)["days"][self.day.isoformat()]
+
+        holds.place_hold(doctor_id=self.doctor.pk, date=self.day, start_time=time(9, 0), end_time=time(10, 0))
+
+        response = self._get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["days"][self.day.isoformat()], free - 1)
+
+    def test_passed_slots_today_are_not_counted(self):
+        today = timezone.localdate()
+        midday = timezone.localtime().replace(year=today.year, month=today.month, day=today.day, hour=12, minute=30)
+
+        with mock.patch("django.utils.timezone.localtime", return_value=midday):
+            counts = month_free_slot_counts(service=self.service, year=today.year, month=today.month)
+        # 09:00-17:00 in hours: only 13:00 to 16:00 are still ahead
+        self.assertEqual(counts[today], 4)
+
+
+class OptimisticBookingTest(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def _appointment(self):
+        return Appointment(
+            service=self.service,
+            availability=Availability(
+                date=self.date,
+                start_time=time(9, 0),
+                end_time=time(9, 30),
+            ),
+            patient_name="Jane Doe",
+            patient_email="jane@example.com",
+        )
+
+    def test_books_in_a_short_fixed_transaction(self):
+        DayAvailability.objects.create(doctor=self.doctor, date=self.date)
+
+        # SELECT day, conditional UPDATE, INSERT availability, INSERT appointment (+ savepoint)
+        with self.assertNumQueries(6):
+            appointment = book_appointment(self._appointment())
+
+        appointment.availability.refresh_from_db()
+        self.assertFalse(appointment.availability.is_available)
+        self.assertEqual(appointment.doctor, self.doctor)
+
+    def test_second_booking_gets_slot_taken_error(self):
+        book_appointment(self._appointment())
+
+        with self.assertRaises(SlotUnavailableError):
+            book_appointment(self._appointment())
+
+        self.assertEqual(Appointment.objects.count(), 1)
+        self.assertEqual(Availability.objects.count(), 1)
+
+
+class BookingMetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        overrides = override_settings(METRICS_DIR=tmp.name, METRICS_FLUSH_SECONDS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # Keep this test's samples out of the shared METRICS_DIR at exit
+        self.addCleanup(metrics.reset)
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def _counts(self):
+        return {
+            name: metrics.get_value(name)
+            for name in ("booking_attempts_total", "booking_successes_total", "availability_rows_created_total")
+        }
+
+    def test_booking_and_generation_are_counted(self):
+        before = self._counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("appointments:book"),
+                {
+                    "patient_name": "Jane Doe",
+                    "patient_email": "jane@example.com",
+                    "service": self.service.pk,
+                    "date": self.date.isoformat(),
+                    "start_time": "09:00",
+                },
+                HTTP_HOST="localhost:8000",
+            )
+        self.assertEqual(response.status_code, 302)
+        generate_availabilities(days=2)
+
+        after = self._counts()
+        self.assertEqual(after["booking_attempts_total"], before["booking_attempts_total"] + 1)
+        self.assertEqual(after["booking_successes_total"], before["booking_successes_total"] + 1)
+        self.assertEqual(after["availability_rows_created_total"], before["availability_rows_created_total"] + 2)
+
+
+class StatusTransitionTest(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.appointment = self._book(time(9, 0), time(9, 30))
+
+    def _book(self, start, end):
+        return book_appointment(Appointment(
+            service=self.service,
+            availability=Availability(
+                date=self.date,
+                start_time=start,
+                end_time=end,
+            ),
+            patient_name="Jane Doe",
+            patient_email="jane@example.com",
+        ))
+
+    def test_confirm_uses_fixed_queries(self):
+        # SELECT, UPDATE (+ savepoint)
+        with self.assertNumQueries(4):
+            transition_appointment(
+                pk=self.appointment.pk,
+                doctor=self.doctor,
+                target=Appointment.STATUS_CONFIRMED,
+            )
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, Appointment.STATUS_CONFIRMED)
+
+    def test_cancel_releases_slot_with_fixed_queries(self):
+        # SELECT, UPDATE appointment, UPDATE availability, SELECT + UPDATE day (+ savepoint)
+        with self.assertNumQueries(7):
+            transition_appointment(
+                pk=self.appointment.pk,
+                doctor=self.doctor,
+                target=Appointment.STATUS_CANCELLED,
+            )
+
+        self.appointment.availability.refresh_from_db()
+        self.assertTrue(self.appointment.availability.is_available)
+        self.assertEqual(DayAvailability.objects.get(doctor=self.doctor, date=self.date).bitmap, 0)
+
+    def test_cancel_keeps_minutes_rebooked_after_manual_release(self):
+        make_available(None, None, Availability.objects.filter(pk=self.appointment.availability_id))
+        rebooked = self._book(time(9, 0), time(9, 30))
+
+        transition_appointment(
+            pk=self.appointment.pk,
+            doctor=self.doctor,
+            target=Appointment.STATUS_CANCELLED,
+        )
+
+        rebooked.availability.refresh_from_db()
+        self.assertFalse(rebooked.availability.is_available)
+        self.assertEqual(
+            DayAvailability.objects.get(doctor=self.doctor, date=self.date).bitmap,
+            DayAvailability._mask(time(9, 0), time(9, 30)),
+        )
+
+    def test_invalid_transition_is_rejected_in_memory(self):
+        with self.assertRaises(InvalidTransitionError):
+            transition_appointment(
+                pk=self.appointment.pk,
+                doctor=self.doctor,
+                target=Appointment.STATUS_COMPLETED,
+            )
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, Appointment.STATUS_PENDING)
+
+
+class BulkTransitionTest(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.appointments = [
+            book_appointment(Appointment(
+                service=self.service,
+                availability=Availability(
+                    date=self.date,
+                    start_time=time(9 + i, 0),
+                    end_time=time(9 + i, 30),
+                ),
+                patient_name=f"Patient {i}",
+                patient_email=f"patient{i}@example.com",
+            ))
+            for i in range(3)
+        ]
+        transition_appointment(
+            pk=self.appointments[2].pk,
+            doctor=self.doctor,
+            target=Appointment.STATUS_CANCELLED,
+        )
+
+    def test_bulk_cancel_is_set_based_and_reports_per_id(self):
+        pks = [a.pk for a in self.appointments] + [999]
+
+        # SELECT, UPDATE appointments, SELECT + UPDATE availabilities, SELECT + UPDATE day (+ savepoint)
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(8):
+            results = bulk_transition(pks=pks, doctor=self.doctor, target=Appointment.STATUS_CANCELLED)
+
+        self.assertTrue(results[self.appointments[0].pk]["ok"])
+        self.assertTrue(results[self.appointments[1].pk]["ok"])
+        self.assertFalse(results[self.appointments[2].pk]["ok"])
+        self.assertEqual(results[999]["error"], "Appointment not found.")
+
+        self.assertEqual(Availability.objects.filter(is_available=False).count(), 0)
+        self.assertEqual(DayAvailability.objects.get(doctor=self.doctor, date=self.date).bitmap, 0)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_bulk_cancel_keeps_minutes_rebooked_after_manual_release(self):
+        first = self.appointments[0]
+        make_available(None, None, Availability.objects.filter(pk=first.availability_id))
+        rebooked = book_appointment(Appointment(
+            service=self.service,
+            availability=Availability(date=self.date, start_time=time(9, 0), end_time=time(9, 30)),
+            patient_name="Patient 3",
+            patient_email="patient3@example.com",
+        ))
+
+        results = bulk_transition(
+            pks=[first.pk, self.appointments[1].pk],
+            doctor=self.doctor,
+            target=Appointment.STATUS_CANCELLED,
+        )
+
+        self.assertTrue(results[first.pk]["ok"])
+        self.assertEqual(
+            list(Availability.objects.filter(is_available=False).values_list("pk", flat=True)),
+            [rebooked.availability_id],
+        )
+        self.assertEqual(
+            DayAvailability.objects.get(doctor=self.doctor, date=self.date).bitmap,
+            DayAvailability._mask(time(9, 0), time(9, 30)),
+        )
+
+
+class SlotHoldTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+
+    def _hold(self, start, end, token=None):
+        return holds.place_hold(
+            doctor_id=self.doctor.pk,
+            date=self.date,
+            start_time=start,
+            end_time=end,
+            token=token,
+        )
+
+    def test_overlapping_hold_is_refused(self):
+        token = self._hold(time(9, 0), time(9, 30))
+        self.assertIsNotNone(token)
+
+        self.assertIsNone(self._hold(time(9, 15), time(9, 45)))
+        self.assertIsNotNone(self._hold(time(9, 30), time(10, 0)))
+
+        # Released holds free the minutes again
+        holds.release_hold(token)
+        self.assertIsNotNone(self._hold(time(9, 0), time(9, 30)))
+
+    def test_held_slot_is_hidden_from_others_only(self):
+        token = self._hold(time(9, 0), time(9, 30))
+        slots = get_cached_slots(doctor=self.doctor, service=self.service, date=self.date)
+
+        others = holds.exclude_held(slots, doctor_id=self.doctor.pk, date=self.date)
+        mine = holds.exclude_held(slots, doctor_id=self.doctor.pk, date=self.date, token=token)
+
+        self.assertNotIn(time(9, 0), [s.start_time for s in others])
+        self.assertIn(time(9, 0), [s.start_time for s in mine])
+
+    def test_form_rejects_slot_held_by_someone_else(self):
+        token = self._hold(time(9, 0), time(9, 30))
+        data = {
+            "patient_name": "Jane Doe",
+            "patient_email": "jane@example.com",
+            "service": self.service.pk,
+            "date": self.date.isoformat(),
+            "start_time": "09:00",
+        }
+
+        form = AppointmentCreateForm(data=data)
+        self.assertFalse(form.is_valid())
+
+        form = AppointmentCreateForm(data=data, hold_token=token)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def _post_hold(self, start_time, **extra):
+        return self.client.post(
+            reverse("appointments:hold"),
+            {"service": self.service.pk, "date": self.date.isoformat(), "start_time": start_time, **extra},
+            HTTP_HOST="localhost:8000",
+            HTTP_X_FORWARDED_FOR="203.0.113.7",
+        )
+
+    def test_hold_belongs_to_the_session(self):
+        other = self._hold(time(9, 0), time(9, 30))
+
+        # A token in the request body is ignored, so it cannot take over a hold
+        response = self._post_hold("09:00", hold_token=other)
+        self.assertContains(response, "Someone else is booking")
+
+        response = self._post_hold("10:00")
+        self.assertContains(response, "We are holding this time")
+        token = self.client.session[holds.SESSION_KEY]
+        self.assertNotEqual(token, other)
+
+    def test_one_live_hold_per_session_and_ip(self):
+        self._post_hold("10:00")
+        self._post_hold("11:00")
+        free = [s.start_time for s in holds.exclude_held(
+            get_cached_slots(doctor=self.doctor, service=self.service, date=self.date),
+            doctor_id=self.doctor.pk,
+            date=self.date,
+        )]
+        self.assertIn(time(10, 0), free)
+        self.assertNotIn(time(11, 0), free)
+
+        # A fresh session from the same IP replaces that hold too
+        self.client.cookies.clear()
+        self._post_hold("12:00")
+        free = [s.start_time for s in holds.exclude_held(
+            get_cached_slots(doctor=self.doctor, service=self.service, date=self.date),
+            doctor_id=self.doctor.pk,
+            date=self.date,
+        )]
+        self.assertIn(time(11, 0), free)
+        self.assertNotIn(time(12, 0), free)
+
+    @override_settings(APPOINTMENT_HOLD_RATE_LIMIT=2)
+    def test_hold_requests_are_rate_limited(self):
+        self.assertEqual(self._post_hold("10:00").status_code, 200)
+        self.assertEqual(self._post_hold("10:30").status_code, 200)
+        self.assertEqual(self._post_hold("11:00").status_code, 429)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        date = timezone.localdate() + timedelta(days=1)
+        availabilities = Availability.objects.bulk_create([
+            Availability(
+                doctor=self.doctor,
+                date=date + timedelta(days=i // 16),
+                start_time=time(9 + (i % 16) // 2, 30 * (i % 2)),
+                end_time=time(9 + (i % 16) // 2, 29 + 30 * (i % 2)),
+                is_available=False,
+            )
+            for i in range(30)
+        ])
+        Appointment.objects.bulk_create([
+            Appointment(
+                doctor=self.doctor,
+                service=service,
+                availability=a,
+                patient_name="Jane Doe",
+                patient_email="jane@example.com",
+            )
+            for a in availabilities
+        ])
+        # Ties on created_at must be broken by id
+        Appointment.objects.update(created_at=timezone.now())
+        self.factory = RequestFactory()
+
+    def _page(self, cursor=None):
+        request = self.factory.get("/appointments/doctor/", {"cursor": cursor} if cursor else {})
+        request.user = self.doctor
+        return DoctorAppointmentListView.as_view()(request).context_data
+
+    def test_walks_every_row_once_in_order(self):
+        expected = list(
+            Appointment.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+
+        seen, cursor = [], None
+        while True:
+            ctx = self._page(cursor)
+            seen += [a.pk for a in ctx["appointments"]]
+            if not ctx["page_obj"].has_next():
+                break
+            cursor = ctx["page_obj"].next_cursor
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(ctx["paginator"].count, 30)
+
+        # Back from the last page lands on the page before it
+        previous = self._page(ctx["page_obj"].previous_cursor)
+        self.assertEqual([a.pk for a in previous["appointments"]], expected[12:24])
+        self.assertTrue(previous["page_obj"].has_previous())
+
+    def test_deep_page_costs_the_same_as_page_one(self):
+        first = self._page()
+
+        # Capped count + page_size + 1 rows, no OFFSET (+ the calendar feed token)
+        with self.assertNumQueries(3):
+            self._page(first["page_obj"].next_cursor)
+
+    def test_malformed_cursor_falls_back_to_first_page(self):
+        ctx = self._page("not-a-cursor")
+        self.assertEqual(len(ctx["appointments"]), 12)
+        self.assertFalse(ctx["page_obj"].has_previous())
+
+
+class AppointmentExportTest(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+        self.confirmed = self._book(self.date, time(9, 0), Appointment.STATUS_CONFIRMED)
+        self.pending = self._book(self.date + timedelta(days=1), time(9, 0), Appointment.STATUS_PENDING)
+        self.factory = RequestFactory()
+
+    def _book(self, date, start, status):
+        return book_appointment(Appointment(
+            service=self.service,
+            availability=Availability(date=date, start_time=start, end_time=time(start.hour, 30)),
+            patient_name="Jane, Doe",
+            patient_email="jane@example.com",
+            status=status,
+        ))
+
+    def _export(self, **params):
+        request = self.factory.get("/appointments/doctor/export/", params)
+        request.user = self.doctor
+        return AppointmentExportView.as_view()(request)
+
+    def _rows(self, response):
+        return b"".join(response.streaming_content).decode().splitlines()
+
+    def test_streams_csv_rows(self):
+        response = self._export()
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = self._rows(response)
+        self.assertTrue(rows[0].startswith("id,created_at,date"))
+        self.assertEqual(len(rows), 3)
+        self.assertIn('"Jane, Doe"', rows[1])
+
+    def test_filters_by_date_range_and_status(self):
+        rows = self._rows(self._export(date_from=self.date.isoformat(), date_to=self.date.isoformat()))
+        self.assertEqual([r.split(",")[0] for r in rows[1:]], [str(self.confirmed.pk)])
+
+        rows = self._rows(self._export(status=Appointment.STATUS_PENDING))
+        self.assertEqual([r.split(",")[0] for r in rows[1:]], [str(self.pending.pk)])
+
+    def test_rejects_inverted_range(self):
+        response = self._export(date_from=self.date.isoformat(), date_to=(self.date - timedelta(days=1)).isoformat())
+        self.assertEqual(response.status_code, 400)
+
+    def test_escapes_formula_cells(self):
+        Appointment.objects.filter(pk=self.confirmed.pk).update(
+            patient_name='=HYPERLINK("http://evil.example","x")',
+            patient_phone="+2348000000",
+            notes="@SUM(A1)",
+        )
+        rows = list(csv.reader(self._rows(self._export(status=Appointment.STATUS_CONFIRMED))))
+        row = dict(zip(rows[0], rows[1]))
+
+        self.assertEqual(row["patient_name"], '\'=HYPERLINK("http://evil.example","x")')
+        self.assertEqual(row["patient_phone"], "'+2348000000")
+        self.assertEqual(row["notes"], "'@SUM(A1)")
+        self.assertEqual(row["patient_email"], "jane@example.com")
+
+
+class CalendarFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            role=User.ROLE_DOCTOR,
+        )
+        self.service = Service.objects.create(
+            doctor=self.doctor,
+            name="Consultation",
+            duration_minutes=30,
+        )
+        self.date = timezone.localdate() + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment = book_appointment(Appointment(
+                service=self.service,
+                availability=Availability(date=self.date, start_time=time(9, 0), end_time=time(9, 30)),
+                patient_name="Jane Doe",
+                patient_email="jane@example.com",
+            ))
+        self.factory = RequestFactory()
+        self.token = feed_token(self.doctor.pk)
+
+    def _get(self, token=None, **headers):
+        request = self.factory.get("/feed.ics", headers=headers)
+        return DoctorCalendarFeedView.as_view()(request, token=token or self.token)
+
+    def test_feed_lists_upcoming_appointments(self):
+        response = self._get()
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn("BEGIN:VCALENDAR", body)
+        self.assertIn(f"UID:appointment-{self.appointment.pk}@", body)
+        self.assertIn("STATUS:TENTATIVE", body)
+        self.assertTrue(response["ETag"])
+        self.assertTrue(response["Last-Modified"])
+
+    def test_unchanged_schedule_is_304_after_the_token_lookup(self):
+        etag = self._get()["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self._get(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_status_change_invalidates_the_feed(self):
+        etag = self._get()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_appointment(
+                pk=self.appointment.pk,
+                doctor=self.doctor,
+                target=Appointment.STATUS_CONFIRMED,
+            )
+
+        response = self._get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("STATUS:CONFIRMED", response.content.decode())
+
+    def test_bad_token_is_404(self):
+        with self.assertRaises(Http404):
+            self._get(token=f"{self.doctor.pk}:forged")
+
+    def test_reset_revokes_the_old_url(self):
+        self.client.force_login(self.doctor)
+        response = self.client.post(reverse("appointments:calendar_feed_reset"), HTTP_HOST="localhost:8000")
+        self.assertRedirects(response, reverse("appointments:doctor"), fetch_redirect_response=False)
+
+        with self.assertRaises(Http404):
+            self._get()
+        self.assertEqual(self._get(token=feed_token(self.doctor.pk)).status_code, 200)
+
+    def test_queryset_delete_invalidates_the_feed(self):
+        etag = self._get()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.filter(pk=self.appointment.pk).delete()
+
+        response = self._get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(f"UID:appointment-{self.appointment.pk}@", response.content.decode())
+
+    def test_bulk_transition_invalidates_the_feed(self):
+        etag = self._get()["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition(pks=[self.appointment.pk], doctor=self.doctor, target=Appointment.STATUS_CANCELLED)
+
+        response = self._get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(f"UID:appointment-{self.appointment.pk}@", response.content.decode())
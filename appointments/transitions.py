@@ -0,0 +1,177 @@
+# appointments/transitions.py
+"""
+Appointment status transitions for the doctor views.
+
+Transitions are validated in memory against TRANSITIONS and written with
+conditional UPDATEs, so a transition costs a fixed number of statements:
+
+  confirm / complete: SELECT appointment, UPDATE appointment
+  cancel:             + UPDATE availability, SELECT + UPDATE day bitmap
+
+Appointment.save() (full_clean, related lookups) is not involved.
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import cache as slot_cache
+from .emails import send_status_emails
+from .models import Appointment, Availability, DayAvailability
+
+TRANSITIONS = {
+    Appointment.STATUS_PENDING: {Appointment.STATUS_CONFIRMED, Appointment.STATUS_CANCELLED},
+    Appointment.STATUS_CONFIRMED: {Appointment.STATUS_COMPLETED, Appointment.STATUS_CANCELLED},
+    Appointment.STATUS_CANCELLED: set(),
+    Appointment.STATUS_COMPLETED: set(),
+}
+
+
+class InvalidTransitionError(ValidationError):
+    """Raised when the requested status change is not allowed."""
+
+
+def check_transition(current: str, target: str) -> None:
+    if target not in TRANSITIONS.get(current, set()):
+        raise InvalidTransitionError(
+            f"Cannot change an appointment from {current} to {target}."
+        )
+
+
+def releases_slot(current: str, target: str) -> bool:
+    return (
+        current in Appointment.LOCKED_STATUSES
+        and target not in Appointment.LOCKED_STATUSES
+    )
+
+
+def transition_appointment(*, pk, doctor, target: str) -> Appointment:
+    """
+    Move one of `doctor`'s appointments to `target`.
+
+    Raises Appointment.DoesNotExist if it is not the doctor's appointment and
+    InvalidTransitionError if the change is not allowed (including when the
+    status changed concurrently since it was read).
+    """
+    appointment = (
+        Appointment.objects
+        .select_related("service", "availability")
+        .only(
+            "id",
+            "status",
+            "doctor",
+            "patient_name",
+            "patient_email",
+            "service__name",
+            "availability__date",
+            "availability__start_time",
+            "availability__end_time",
+        )
+        .get(pk=pk, doctor=doctor)
+    )
+    current = appointment.status
+    check_transition(current, target)
+
+    with transaction.atomic():
+        # Conditional on the status we validated against
+        updated = (
+            Appointment.objects
+            .filter(pk=appointment.pk, status=current)
+            .update(status=target)
+        )
+        if not updated:
+            raise InvalidTransitionError("This appointment was updated by someone else. Please reload.")
+
+        if releases_slot(current, target):
+            availability = appointment.availability
+            # Only if still held: a slot freed by other means may be rebooked already
+            if Availability.objects.filter(pk=availability.pk, is_available=False).update(is_available=True):
+                DayAvailability.release(
+                    doctor_id=appointment.doctor_id,
+                    date=availability.date,
+                    start_time=availability.start_time,
+                    end_time=availability.end_time,
+                )
+
+    appointment.status = target
+    transaction.on_commit(lambda: slot_cache.bump_schedule_version(appointment.doctor_id))
+    transaction.on_commit(lambda: send_status_emails([appointment]))
+    return appointment
+
+
+def bulk_transition(*, pks, doctor, target: str) -> dict:
+    """
+    Move a set of `doctor`'s appointments to `target` in one transaction.
+
+    Set-based: one SELECT, one UPDATE for the appointments, one SELECT +
+    UPDATE for the released availabilities and one bitmap swap per
+    affected day.
+    Returns {pk: {"ok": True, "status": target} | {"ok": False, "error": msg}}.
+    Patient notifications are queued as one batch after commit.
+    """
+    pks = set(pks)
+    results = {pk: {"ok": False, "error": "Appointment not found."} for pk in pks}
+
+    with transaction.atomic():
+        rows = list(
+            Appointment.objects
+            .select_for_update(of=("self",))
+            .select_related("service", "availability")
+            .filter(pk__in=pks, doctor=doctor)
+            .only(
+                "id",
+                "status",
+                "doctor",
+                "patient_name",
+                "patient_email",
+                "service__name",
+                "availability__date",
+                "availability__start_time",
+                "availability__end_time",
+            )
+        )
+
+        moved = []
+        released = []
+        for appointment in rows:
+            try:
+                check_transition(appointment.status, target)
+            except InvalidTransitionError as exc:
+                results[appointment.pk] = {"ok": False, "error": exc.messages[0]}
+                continue
+            if releases_slot(appointment.status, target):
+                released.append(appointment.availability)
+            moved.append(appointment)
+
+        if not moved:
+            return results
+
+        Appointment.objects.filter(pk__in=[a.pk for a in moved]).update(status=target)
+
+        if released:
+            # Only slots still held: one freed by other means may be rebooked already
+            held = set(
+                Availability.objects
+                .select_for_update()
+                .filter(pk__in=[a.pk for a in released], is_available=False)
+                .values_list("pk", flat=True)
+            )
+            released = [a for a in released if a.pk in held]
+            Availability.objects.filter(pk__in=held).update(is_available=True)
+
+            spans_by_day = defaultdict(list)
+            for availability in released:
+                spans_by_day[availability.date].append(
+                    (availability.start_time, availability.end_time)
+                )
+            for date, spans in spans_by_day.items():
+                DayAvailability.release_spans(doctor_id=doctor.pk, date=date, spans=spans)
+
+        for appointment in moved:
+            appointment.status = target
+            results[appointment.pk] = {"ok": True, "status": target}
+
+        transaction.on_commit(lambda: slot_cache.bump_schedule_version(doctor.pk))
+        transaction.on_commit(lambda: send_status_emails(moved))
+
+    return results
@@ -1,11 +1,19 @@
 from django.urls import path
 from .views import (
     AppointmentCreateView,
+    AppointmentExportView,
     DoctorAppointmentListView,
     AppointmentSuccessView,
+    BulkAppointmentStatusView,
+    CalendarFeedResetView,
     CancelAppointmentView,
+    CompleteAppointmentView,
     ConfirmAppointmentView,
+    DoctorCalendarFeedView,
     AppointmentSlotsView,
+    MonthAvailabilityView,
+    NextAvailableSlotsView,
+    SlotHoldView,
 )
 
 app_name = "appointments"
@@ -16,9 +24,19 @@ urlpatterns = [
 
     # HTMX endpoint
     path("slots/", AppointmentSlotsView.as_view(), name="slots"),
+    path("slots/hold/", SlotHoldView.as_view(), name="hold"),
+    path("slots/next/", NextAvailableSlotsView.as_view(), name="next_slots"),
+    path("slots/month/", MonthAvailabilityView.as_view(), name="month_availability"),
 
     # Doctor views
     path("doctor/", DoctorAppointmentListView.as_view(), name="doctor"),
+    path("doctor/export/", AppointmentExportView.as_view(), name="export"),
+    path("doctor/bulk/", BulkAppointmentStatusView.as_view(), name="bulk_status"),
+    path("doctor/calendar/reset/", CalendarFeedResetView.as_view(), name="calendar_feed_reset"),
     path("doctor/<int:pk>/confirm/", ConfirmAppointmentView.as_view(), name="confirm"),
     path("doctor/<int:pk>/cancel/", CancelAppointmentView.as_view(), name="cancel"),
+    path("doctor/<int:pk>/complete/", CompleteAppointmentView.as_view(), name="complete"),
+
+    # Calendar feed (per-doctor secret token, no login)
+    path("calendar/<str:token>.ics", DoctorCalendarFeedView.as_view(), name="calendar_feed"),
 ]
@@ -1,13 +1,19 @@
 # appointments/utils.py
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import List, Tuple
+import calendar
+import hashlib
+from datetime import date as date_cls, datetime, time, timedelta
+from typing import Dict, List, NamedTuple, Tuple
 
 from django.conf import settings
+from django.db.models import Count, Sum
 from django.utils import timezone
 
-from .models import Availability, Service
+from core import metrics
+from . import bitmap
+from . import cache as slot_cache
+from .models import DayAvailability, Service
 
 
 def _parse_hhmm(value: str):
@@ -31,61 +37,269 @@ def _service_step_minutes(service: Service) -> int:
     return max(5, int(service.duration_minutes))
 
 
-def generate_or_get_availabilities(*, doctor, service: Service, date) -> List[Availability]:
-    """
-    Doctor is available every day.
-    For a selected date and service, we create Availability slots for that day
-    (if not already created), with slot size = service.duration_minutes.
+class Slot(NamedTuple):
+    start_time: time
+    end_time: time
 
-    Availability rows are marked is_available=True initially.
-    Booking locks them to False via Appointment.save().
-    """
+
+class DatedSlot(NamedTuple):
+    date: date_cls
+    start_time: time
+    end_time: time
+
+
+def day_bounds() -> Tuple[int, int]:
     start_t = _parse_hhmm(settings.APPOINTMENT_DAY_START)
     end_t = _parse_hhmm(settings.APPOINTMENT_DAY_END)
+    return bitmap.minute_of_day(start_t), bitmap.minute_of_day(end_t)
+
+
+def slots_from_bitmap(occupancy: int, service: Service) -> List[Slot]:
+    """
+    Free slots for a service, laid out from APPOINTMENT_DAY_START with
+    slot size = service.duration_minutes, skipping any booked minute.
+    """
+    day_start, day_end = day_bounds()
+    return [
+        Slot(bitmap.time_of_minute(s), bitmap.time_of_minute(e))
+        for s, e in bitmap.free_spans(occupancy, day_start, day_end, _service_step_minutes(service))
+    ]
+
+
+def get_available_slots(*, doctor, service: Service, date) -> List[Slot]:
+    """
+    Read-only slot lookup used by the HTMX endpoint and the booking form.
+
+    A day without a DayAvailability row simply has nothing booked yet, so this
+    never writes and can be served from a replica or cache.
+    """
+    occupancy = (
+        DayAvailability.objects
+        .filter(doctor=doctor, date=date)
+        .values_list("occupancy", flat=True)
+        .first()
+    )
+    return slots_from_bitmap(bitmap.to_int(occupancy), service)
+
+
+def get_cached_slots(*, doctor, service: Service, date) -> List[Slot]:
+    """
+    get_available_slots() behind the versioned slot cache.
+
+    Keyed by (doctor, service, date) and the doctor-day version, which is
+    bumped whenever a booking or cancellation changes the day bitmap.
+    """
+    doctor_id = getattr(doctor, "pk", doctor)
+    key = slot_cache.slots_key(doctor_id, service.pk, service.duration_minutes, date)
+
+    cached = slot_cache.get_slots(key)
+    if cached is not None:
+        metrics.inc("slot_lookups_total", cache="hit")
+        return [Slot(s, e) for s, e in cached]
+
+    metrics.inc("slot_lookups_total", cache="miss")
+    slots = get_available_slots(doctor=doctor_id, service=service, date=date)
+    slot_cache.set_slots(key, [tuple(s) for s in slots])
+    return slots
+
+
+def booking_window_dates(*, weekdays=None) -> List[date_cls]:
+    """Days from today to the end of the booking window, optionally only `weekdays`."""
+    today = timezone.localdate()
+    weekdays = set(weekdays) if weekdays else None
+    return [
+        day
+        for day in (today + timedelta(days=i) for i in range(int(settings.APPOINTMENT_LOOKAHEAD_DAYS) + 1))
+        if weekdays is None or day.weekday() in weekdays
+    ]
+
+
+def find_next_available_slots(
+    *,
+    service: Service,
+    limit: int = 5,
+    weekdays=None,
+    after: time = None,
+    before: time = None,
+    held=None,
+) -> List[DatedSlot]:
+    """
+    First `limit` free slots for a service across the booking window.
+
+    All day bitmaps for the window are fetched in one query and swept in
+    memory; days without a row are fully free. Minutes in `held` ({date:
+    held minute mask}, see holds.held_masks) are treated as booked.
+    Optional filters:
+      - weekdays: iterable of date.weekday() values (Mon=0)
+      - after / before: slot must start at/after `after` and end by `before`
+    """
+    today = timezone.localdate()
+    last_day = today + timedelta(days=int(settings.APPOINTMENT_LOOKAHEAD_DAYS))
+    held = held or {}
+    now_minute = bitmap.minute_of_day(timezone.localtime().time())
 
+    day_start, day_end = day_bounds()
+    earliest = bitmap.minute_of_day(after) if after else day_start
+    latest = bitmap.minute_of_day(before) if before else day_end
+
+    occupancy_by_day = dict(
+        DayAvailability.objects.filter(
+            doctor_id=service.doctor_id,
+            date__range=(today, last_day),
+        ).values_list("date", "occupancy")
+    )
+
+    step = _service_step_minutes(service)
+    found: List[DatedSlot] = []
+    for day in booking_window_dates(weekdays=weekdays):
+        occupancy = bitmap.to_int(occupancy_by_day.get(day)) | held.get(day, 0)
+        for s, e in bitmap.free_spans(occupancy, day_start, day_end, step):
+            if s < earliest or e > latest:
+                continue
+            if day == today and s <= now_minute:
+                continue
+            found.append(DatedSlot(day, bitmap.time_of_minute(s), bitmap.time_of_minute(e)))
+            if len(found) >= limit:
+                return found
+
+    return found
+
+
+def _month_bounds(year: int, month: int) -> Tuple[date_cls, date_cls]:
+    return date_cls(year, month, 1), date_cls(year, month, calendar.monthrange(year, month)[1])
+
+
+def _month_window(year: int, month: int):
+    """(first, last, today, window end, minute of day now) for the month views."""
+    first, last = _month_bounds(year, month)
+    today = timezone.localdate()
+    window_end = today + timedelta(days=int(settings.APPOINTMENT_LOOKAHEAD_DAYS))
+    return first, last, today, window_end, bitmap.minute_of_day(timezone.localtime().time())
+
+
+def month_window_dates(*, year: int, month: int) -> List[date_cls]:
+    """Days of the month inside the booking window (the ones that can have free slots)."""
+    first, last, today, window_end, _ = _month_window(year, month)
+    day, dates = max(first, today), []
+    while day <= min(last, window_end):
+        dates.append(day)
+        day += timedelta(days=1)
+    return dates
+
+
+def month_availability_etag(*, service: Service, year: int, month: int, held=None) -> str:
+    """
+    Cheap validator for the month heatmap: one aggregate over the month's
+    day rows. Any booking or cancellation bumps a row version, so the sum
+    changes whenever a count could change. `held` ({date: held minute
+    mask}) and, for the current month, the time of day are part of it too:
+    holds and passing time change the counts without a row write.
+    """
+    first, last, today, _, now_minute = _month_window(year, month)
+    agg = DayAvailability.objects.filter(
+        doctor_id=service.doctor_id,
+        date__range=(first, last),
+    ).aggregate(rows=Count("id"), versions=Sum("version"))
+
+    day_start, day_end = day_bounds()
+    raw = ":".join(str(part) for part in (
+        service.pk,
+        service.duration_minutes,
+        settings.APPOINTMENT_DAY_START,
+        settings.APPOINTMENT_DAY_END,
+        settings.APPOINTMENT_LOOKAHEAD_DAYS,
+        today.isoformat(),
+        # Only moves while today's slots are passing
+        min(max(now_minute, day_start), day_end) if first <= today <= last else "-",
+        first.isoformat(),
+        agg["rows"],
+        agg["versions"] or 0,
+        sorted((held or {}).items()),
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def month_free_slot_counts(*, service: Service, year: int, month: int, held=None) -> Dict[date_cls, int]:
+    """
+    Free slot count per day of the month for a service, from one query.
+    Days outside the booking window count as 0, today's passed slots are
+    not counted, and minutes in `held` ({date: held minute mask}) count as
+    taken.
+    """
+    first, last, today, window_end, now_minute = _month_window(year, month)
+    held = held or {}
+
+    occupancy_by_day = dict(
+        DayAvailability.objects.filter(
+            doctor_id=service.doctor_id,
+            date__range=(first, last),
+        ).values_list("date", "occupancy")
+    )
+
+    day_start, day_end = day_bounds()
     step = _service_step_minutes(service)
+    counts = {}
+    day = first
+    while day <= last:
+        if today <= day <= window_end:
+            occupancy = bitmap.to_int(occupancy_by_day.get(day)) | held.get(day, 0)
+            spans = bitmap.free_spans(occupancy, day_start, day_end, step)
+            if day == today:
+                spans = [(s, e) for s, e in spans if s > now_minute]
+            counts[day] = len(spans)
+        else:
+            counts[day] = 0
+        day += timedelta(days=1)
+    return counts
+
 
-    day_start = datetime.combine(date, start_t)
-    day_end = datetime.combine(date, end_t)
+def generate_availabilities(*, start=None, days=None, chunk_size: int = 500) -> int:
+    """
+    Pre-materialize DayAvailability rows for every doctor with an active
+    service over the booking window (today + APPOINTMENT_LOOKAHEAD_DAYS).
 
-    slots: List[Tuple] = []
-    cursor = day_start
-    while cursor + timedelta(minutes=step) <= day_end:
-        s = cursor.time()
-        e = (cursor + timedelta(minutes=step)).time()
-        slots.append((s, e))
-        cursor += timedelta(minutes=step)
+    Idempotent: existing rows are left untouched and missing ones are
+    inserted with chunked bulk inserts. Returns the number of rows created.
+    """
+    start = start or timezone.localdate()
+    if days is None:
+        days = int(settings.APPOINTMENT_LOOKAHEAD_DAYS)
+    end = start + timedelta(days=days)
+
+    doctor_ids = list(
+        Service.objects.filter(is_active=True)
+        .values_list("doctor_id", flat=True)
+        .distinct()
+    )
+    if not doctor_ids:
+        return 0
 
-    # Create missing slots idempotently
     existing = set(
-        Availability.objects.filter(
-            doctor=doctor,
-            date=date,
-        ).values_list("start_time", "end_time")
+        DayAvailability.objects.filter(
+            doctor_id__in=doctor_ids,
+            date__range=(start, end),
+        ).values_list("doctor_id", "date")
     )
 
     to_create = []
-    for s, e in slots:
-        if (s, e) not in existing:
-            to_create.append(
-                Availability(
-                    doctor=doctor,
-                    date=date,
-                    start_time=s,
-                    end_time=e,
-                    is_available=True,
-                )
-            )
+    created = 0
+    for doctor_id in doctor_ids:
+        for offset in range(days + 1):
+            day = start + timedelta(days=offset)
+            if (doctor_id, day) in existing:
+                continue
+            to_create.append(DayAvailability(doctor_id=doctor_id, date=day))
+            if len(to_create) >= chunk_size:
+                DayAvailability.objects.bulk_create(to_create, ignore_conflicts=True)
+                created += len(to_create)
+                to_create = []
 
     if to_create:
-        Availability.objects.bulk_create(to_create, ignore_conflicts=True)
-
-    return Availability.objects.filter(
-    doctor=doctor,
-    date=date,
-    is_available=True,
-).order_by("start_time")
+        DayAvailability.objects.bulk_create(to_create, ignore_conflicts=True)
+        created += len(to_create)
 
+    metrics.inc("availability_rows_created_total", created)
+    return created
 
 
 def validate_booking_window(date) -> None:
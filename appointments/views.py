@@ -1,18 +1,45 @@
 # appointments/views.py
+from datetime import datetime
+
+from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.db import transaction
-from django.shortcuts import get_object_or_404, redirect
-from django.urls import reverse_lazy
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.views import View
 from django.views.generic import CreateView, ListView, TemplateView
 
+from core import metrics
 from core_app.mixins import SEOMixin
 from messaging.models import MessageIntent
+from . import cache as slot_cache
+from . import holds
 from .emails import send_booking_emails
-from .forms import AppointmentCreateForm
-from .models import Appointment, Service
-from .utils import generate_or_get_availabilities, validate_booking_window
+from .exports import export_queryset, iter_csv_rows
+from .ics import doctor_id_from_token, feed_token, regenerate_feed_token, render_feed
+from .forms import (
+    AppointmentCreateForm,
+    AppointmentExportForm,
+    BulkStatusForm,
+    MonthAvailabilityForm,
+    NextAvailableSlotsForm,
+)
+from .models import Appointment, Service, SlotUnavailableError
+from .pagination import KeysetPaginationMixin
+from .transitions import InvalidTransitionError, bulk_transition, transition_appointment
+from .utils import (
+    booking_window_dates,
+    get_cached_slots,
+    month_availability_etag,
+    month_free_slot_counts,
+    month_window_dates,
+    validate_booking_window,
+)
 
 
 class AppointmentCreateView(SEOMixin, SuccessMessageMixin, CreateView):
@@ -26,16 +53,33 @@ class AppointmentCreateView(SEOMixin, SuccessMessageMixin, CreateView):
     seo_description = "Book a consultation for arthritis, gout, lupus, inflammatory back pain, joint pain and chronic pain management."
 
 
+    def get_initial(self):
+        # Allows "next available" links to prefill service/date/time
+        initial = super().get_initial()
+        for key in ("service", "date", "start_time"):
+            if self.request.GET.get(key):
+                initial[key] = self.request.GET[key]
+        return initial
+
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         # In your design, doctor is derived from service; still pass None for now.
         kwargs["doctor"] = None
+        kwargs["hold_token"] = holds.session_token(self.request)
         return kwargs
 
     @transaction.atomic
     def form_valid(self, form):
-        response = super().form_valid(form)
+        metrics.inc("booking_attempts_total")
+        try:
+            response = super().form_valid(form)
+        except SlotUnavailableError as exc:
+            # Lost the race for the slot: show the form again, no lock wait
+            metrics.inc("booking_slot_conflicts_total")
+            form.add_error(None, exc)
+            return self.form_invalid(form)
         appointment = self.object
+        transaction.on_commit(lambda: metrics.inc("booking_successes_total"))
 
         MessageIntent.objects.create(
             appointment=appointment,
@@ -47,6 +91,9 @@ class AppointmentCreateView(SEOMixin, SuccessMessageMixin, CreateView):
 
         # Send emails AFTER commit (so availability locking is finalized)
         transaction.on_commit(lambda: send_booking_emails(appointment))
+        # The slot is booked now; its hold is no longer needed
+        hold_token = self.request.session.pop(holds.SESSION_KEY, None)
+        transaction.on_commit(lambda: holds.release_hold(hold_token))
         return response
 
 
@@ -55,6 +102,8 @@ class AppointmentSlotsView(TemplateView):
     HTMX endpoint:
     GET /appointments/slots/?service=<id>&date=YYYY-MM-DD
     Returns a partial <option> list for the start_time field.
+
+    Read-only: rows are pre-generated by `manage.py generate_availability`.
     """
     template_name = "appointments/partials/slot_options.html"
 
@@ -64,6 +113,7 @@ class AppointmentSlotsView(TemplateView):
         date_val = self.request.GET.get("date")
 
         ctx["slots"] = []
+        ctx["selected"] = self.request.GET.get("start_time", "")
 
         if not service_id or not date_val:
             return ctx
@@ -74,19 +124,128 @@ class AppointmentSlotsView(TemplateView):
 
             validate_booking_window(chosen_date)
 
-            qs = generate_or_get_availabilities(
-                doctor=service.doctor,
-                service=service,
+            ctx["slots"] = holds.exclude_held(
+                get_cached_slots(doctor=service.doctor, service=service, date=chosen_date),
+                doctor_id=service.doctor_id,
                 date=chosen_date,
+                token=holds.session_token(self.request),
             )
-            ctx["slots"] = qs
         except Exception:
             ctx["slots"] = []
 
         return ctx
 
 
-class DoctorAppointmentListView(LoginRequiredMixin, UserPassesTestMixin, ListView):
+class SlotHoldView(View):
+    """
+    HTMX endpoint:
+    POST /appointments/slots/hold/  service, date, start_time
+    Holds the selected slot for APPOINTMENT_SLOT_HOLD_SECONDS while the
+    patient fills in the form. The hold belongs to the session; one live
+    hold per session and client IP, and requests are rate-limited per IP.
+    """
+    template_name = "appointments/partials/slot_hold.html"
+
+    def post(self, request, *args, **kwargs):
+        ip = holds.client_ip(request)
+        if not holds.allow_request(ip):
+            return HttpResponse("Too many requests", status=429, content_type="text/plain")
+
+        token = holds.session_token(request)
+        ctx = {"held": False, "held_by_other": False}
+
+        try:
+            service = Service.objects.get(pk=request.POST.get("service"), is_active=True)
+            chosen_date = AppointmentCreateForm.base_fields["date"].to_python(request.POST.get("date"))
+            validate_booking_window(chosen_date)
+            start_time = datetime.strptime(request.POST.get("start_time", ""), "%H:%M").time()
+        except Exception:
+            # Nothing (valid) selected: drop any previous hold
+            holds.release_hold(token)
+            return render(request, self.template_name, ctx)
+
+        slots = get_cached_slots(doctor=service.doctor_id, service=service, date=chosen_date)
+        slot = next((s for s in slots if s.start_time == start_time), None)
+        if slot is None:
+            holds.release_hold(token)
+            return render(request, self.template_name, ctx)
+
+        placed = holds.place_hold(
+            doctor_id=service.doctor_id,
+            date=chosen_date,
+            start_time=slot.start_time,
+            end_time=slot.end_time,
+            token=holds.session_token(request, create=True),
+            owner=ip,
+        )
+        ctx["held"] = placed is not None
+        ctx["held_by_other"] = placed is None
+        return render(request, self.template_name, ctx)
+
+
+class NextAvailableSlotsView(TemplateView):
+    """
+    HTMX endpoint:
+    GET /appointments/slots/next/?service=<id>[&limit=5][&weekday=0&weekday=2][&after=HH:MM][&before=HH:MM]
+    Returns the first available slots across the whole booking window.
+    Other patients' holds are skipped, as in the slot list.
+    """
+    template_name = "appointments/partials/next_slots.html"
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        form = NextAvailableSlotsForm(self.request.GET or None)
+        ctx["form"] = form
+        ctx["slots"] = []
+        if form.is_valid():
+            held = holds.held_masks(
+                doctor_id=form.cleaned_data["service"].doctor_id,
+                dates=booking_window_dates(weekdays=form.cleaned_data.get("weekday")),
+                token=holds.session_token(self.request),
+            )
+            ctx["slots"] = form.get_slots(held=held)
+        return ctx
+
+
+class MonthAvailabilityView(View):
+    """
+    JSON endpoint for the date picker:
+    GET /appointments/slots/month/?service=<id>&month=YYYY-MM
+    Returns free slot counts per day so full days can be greyed out.
+    Other patients' holds and today's passed slots are not counted.
+    Supports If-None-Match, answering 304 after a single aggregate query.
+    """
+
+    def get(self, request, *args, **kwargs):
+        form = MonthAvailabilityForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        service = form.cleaned_data["service"]
+        month = form.cleaned_data["month"]
+        held = holds.held_masks(
+            doctor_id=service.doctor_id,
+            dates=month_window_dates(year=month.year, month=month.month),
+            token=holds.session_token(request),
+        )
+
+        etag = f'"{month_availability_etag(service=service, year=month.year, month=month.month, held=held)}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            counts = month_free_slot_counts(service=service, year=month.year, month=month.month, held=held)
+            response = JsonResponse({
+                "service": service.pk,
+                "month": month.strftime("%Y-%m"),
+                "days": {day.isoformat(): count for day, count in counts.items()},
+            })
+
+        response["ETag"] = etag
+        # Private: the patient's own hold is counted as free
+        patch_cache_control(response, private=True, max_age=60)
+        return response
+
+
+class DoctorAppointmentListView(LoginRequiredMixin, UserPassesTestMixin, KeysetPaginationMixin, ListView):
     model = Appointment
     template_name = "appointments/doctor_appointments.html"
     context_object_name = "appointments"
@@ -111,9 +270,16 @@ class DoctorAppointmentListView(LoginRequiredMixin, UserPassesTestMixin, ListVie
                 "availability__start_time",
                 "availability__end_time",
             )
-            .order_by("-created_at")
+            .order_by("-created_at", "-id")
         )
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx["calendar_feed_url"] = self.request.build_absolute_uri(
+            reverse("appointments:calendar_feed", args=[feed_token(self.request.user.pk)])
+        )
+        return ctx
+
 
 class AppointmentSuccessView(SEOMixin, TemplateView):
     template_name = "appointments/success.html"
@@ -131,13 +297,12 @@ class AppointmentStatusUpdateView(LoginRequiredMixin, UserPassesTestMixin, View)
         if self.status is None:
             return redirect("appointments:doctor")
 
-        appointment = get_object_or_404(
-            Appointment.objects.only("id", "status", "doctor"),
-            pk=pk,
-            doctor=request.user,
-        )
-        appointment.status = self.status
-        appointment.save(update_fields=["status"])
+        try:
+            transition_appointment(pk=pk, doctor=request.user, target=self.status)
+        except Appointment.DoesNotExist:
+            raise Http404("Appointment not found.")
+        except InvalidTransitionError as exc:
+            messages.error(request, exc.messages[0])
         return redirect("appointments:doctor")
 
 
@@ -147,3 +312,112 @@ class ConfirmAppointmentView(AppointmentStatusUpdateView):
 
 class CancelAppointmentView(AppointmentStatusUpdateView):
     status = Appointment.STATUS_CANCELLED
+
+
+class CompleteAppointmentView(AppointmentStatusUpdateView):
+    status = Appointment.STATUS_COMPLETED
+
+
+class BulkAppointmentStatusView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    POST /appointments/doctor/bulk/  action=confirm|cancel&ids=<id>&ids=<id>...
+    Transitions all selected appointments in one transaction.
+    Answers JSON per-ID results when asked for JSON, otherwise flashes a
+    summary and redirects back to the list.
+    """
+
+    def test_func(self):
+        return getattr(self.request.user, "is_doctor", False)
+
+    def post(self, request, *args, **kwargs):
+        wants_json = "application/json" in request.headers.get("Accept", "")
+        form = BulkStatusForm(request.POST)
+
+        if not form.is_valid():
+            if wants_json:
+                return JsonResponse({"errors": form.errors}, status=400)
+            for errors in form.errors.values():
+                messages.error(request, errors[0])
+            return redirect("appointments:doctor")
+
+        results = bulk_transition(
+            pks=form.cleaned_data["ids"],
+            doctor=request.user,
+            target=form.target_status,
+        )
+
+        if wants_json:
+            return JsonResponse({"results": {str(pk): r for pk, r in results.items()}})
+
+        done = sum(1 for r in results.values() if r["ok"])
+        if done:
+            messages.success(request, f"{done} appointment(s) updated.")
+        if done < len(results):
+            messages.error(request, f"{len(results) - done} appointment(s) could not be updated.")
+        return redirect("appointments:doctor")
+
+
+class AppointmentExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    GET /appointments/doctor/export/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&status=<status>
+    Streams the doctor's appointments as CSV in constant memory.
+    """
+
+    def test_func(self):
+        return getattr(self.request.user, "is_doctor", False)
+
+    def get(self, request, *args, **kwargs):
+        form = AppointmentExportForm(request.GET)
+        if not form.is_valid():
+            return JsonResponse({"errors": form.errors}, status=400)
+
+        queryset = export_queryset(doctor=request.user, **form.cleaned_data)
+        filename = f"appointments-{timezone.localdate().isoformat()}.csv"
+
+        response = StreamingHttpResponse(iter_csv_rows(queryset), content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class DoctorCalendarFeedView(View):
+    """
+    GET /appointments/calendar/<token>.ics
+    Per-doctor iCalendar feed for calendar apps to poll. Answers 304 after
+    the token lookup when the schedule has not changed.
+    """
+
+    def get(self, request, token, *args, **kwargs):
+        doctor_id = doctor_id_from_token(token)
+        if doctor_id is None:
+            raise Http404("Unknown calendar feed.")
+
+        version = slot_cache.get_schedule_version(doctor_id)
+        today = timezone.localdate()
+        etag = f'"{doctor_id}-{version}-{today.isoformat()}"'
+        # The feed window also moves at midnight
+        midnight = timezone.make_aware(datetime.combine(today, datetime.min.time()))
+        last_modified = max(version // 1000, int(midnight.timestamp()))
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(render_feed(doctor_id, version), content_type="text/calendar; charset=utf-8")
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, private=True, max_age=300)
+        return response
+
+
+class CalendarFeedResetView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """
+    POST /appointments/doctor/calendar/reset/
+    Issues a new calendar feed token; the old feed URL stops working.
+    """
+
+    def test_func(self):
+        return getattr(self.request.user, "is_doctor", False)
+
+    def post(self, request, *args, **kwargs):
+        regenerate_feed_token(request.user.pk)
+        messages.success(request, "Your calendar feed link was reset. Subscribe again with the new link.")
+        return redirect("appointments:doctor")
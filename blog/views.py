@@ -3,6 +3,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.contrib import messages
 from core_app.mixins import SEOMixin
+from core_app.pagecache import ConditionalDetailMixin
 from .models import Post
 from .forms import PostForm
 
@@ -27,13 +28,15 @@ class PostListView(SEOMixin, ListView):
             "author__last_name",
         )
 
-class PostDetailView(SEOMixin, DetailView):
+class PostDetailView(ConditionalDetailMixin, SEOMixin, DetailView):
     model = Post
     template_name = "blog/post_detail.html"
     context_object_name = "post"
+    # The article footer lists other recent posts
+    conditional_models = ("core_app.SiteSettings", "blog.Post")
 
     def get_queryset(self):
-        return Post.objects.filter(is_published=True)
+        return Post.objects.filter(is_published=True).select_related("author")
 
     def get_seo_title(self):
         return f"{self.object.title} | Blog"
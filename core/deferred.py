@@ -0,0 +1,96 @@
+# core/deferred.py
+"""
+Deferred-field access detector for .only()/.defer() querysets.
+
+Reading a field that was left out of .only() makes Django run one extra
+SELECT per instance (DeferredAttribute -> refresh_from_db). Inside detect()
+every such query is recorded with the model, the field and where it was
+read from (template line or project frame, as in core.nplusone).
+
+Tests:
+    with assert_no_deferred_loads():
+        self.client.get(url)
+
+Development (DEBUG only): "core.deferred.DeferredFieldMiddleware" logs every
+offending request to the "core.deferred" logger (or raises, with
+DEFERRED_FIELDS_RAISE = True).
+"""
+import logging
+import sys
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.models.query_utils import DeferredAttribute
+
+from .nplusone import _origin
+
+logger = logging.getLogger(__name__)
+
+_DEFERRED_GET = DeferredAttribute.__get__.__code__
+
+
+class DeferredFieldError(AssertionError):
+    """Raised when a deferred field is loaded lazily."""
+
+
+def _deferred_access():
+    """(model label, field name) if this query comes from a deferred field read."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code is _DEFERRED_GET:
+            descriptor = frame.f_locals["self"]
+            return descriptor.field.model._meta.label, descriptor.field.attname
+        frame = frame.f_back
+    return None
+
+
+class DeferredLoadRecorder:
+    def __init__(self):
+        self.loads = []
+
+    def __call__(self, execute, sql, params, many, context):
+        access = _deferred_access()
+        if access:
+            self.loads.append((*access, _origin()))
+        return execute(sql, params, many, context)
+
+
+def format_report(loads) -> str:
+    return "\n".join(f"{label}.{field} from {origin}" for label, field, origin in loads)
+
+
+@contextmanager
+def detect(using="default"):
+    recorder = DeferredLoadRecorder()
+    with connections[using].execute_wrapper(recorder):
+        yield recorder
+
+
+@contextmanager
+def assert_no_deferred_loads(using="default"):
+    with detect(using) as recorder:
+        yield recorder
+    if recorder.loads:
+        raise DeferredFieldError("Deferred fields loaded lazily:\n" + format_report(recorder.loads))
+
+
+class DeferredFieldMiddleware:
+    """DEBUG-only: report deferred-field loads per request."""
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect() as recorder:
+            response = self.get_response(request)
+
+        if recorder.loads:
+            report = format_report(recorder.loads)
+            if settings.DEFERRED_FIELDS_RAISE:
+                raise DeferredFieldError(f"{request.method} {request.path}\n{report}")
+            logger.warning("Deferred field loads on %s %s\n%s", request.method, request.path, report)
+        return response
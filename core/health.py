@@ -0,0 +1,128 @@
+# core/health.py
+"""
+Liveness and readiness endpoints, answered by the first middleware.
+
+  /healthz/  "ok" as long as the process serves requests; no DB, cache,
+             session or host checks, so any load balancer can poll it.
+  /readyz/   probes the database and the cache, each bounded by
+             HEALTHCHECK_TIMEOUT seconds, and reports per-dependency status
+             and latency as JSON. 200 when all are up, 503 otherwise.
+             Probes run at most once per HEALTHCHECK_INTERVAL seconds per
+             process; requests in between get the last results. Errors are
+             reported by exception class only (details go to the log), as
+             the endpoint is unauthenticated.
+
+Both skip the rest of the stack (canonical-host redirects included), which
+is why HealthCheckMiddleware must stay first in MIDDLEWARE.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse, JsonResponse
+
+logger = logging.getLogger(__name__)
+
+HEALTHZ_PATHS = ("/healthz", "/healthz/")
+READYZ_PATHS = ("/readyz", "/readyz/")
+
+# Probes run here so a hung dependency can be timed out; a probe stuck past
+# its timeout keeps its worker, and later probes queue and time out too
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="readyz")
+# Last probe results, shared by the requests of one HEALTHCHECK_INTERVAL
+_last_run = {"at": None, "results": None}
+_run_lock = threading.Lock()
+
+
+def check_database(alias="default"):
+    # Runs in a worker thread, i.e. on that thread's own connection
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def check_cache(alias="default"):
+    key = f"readyz:{uuid.uuid4().hex}"
+    cache = caches[alias]
+    cache.set(key, 1, timeout=10)
+    try:
+        if cache.get(key) != 1:
+            raise RuntimeError("value not read back")
+    finally:
+        cache.delete(key)
+
+
+CHECKS = {
+    "database": check_database,
+    "cache": check_cache,
+}
+
+
+def _timed(check) -> float:
+    started = time.perf_counter()
+    check()
+    return time.perf_counter() - started
+
+
+def run_checks(timeout=None) -> dict:
+    """{name: {"ok", "latency_ms"[, "error"]}} for every probe in CHECKS."""
+    timeout = settings.HEALTHCHECK_TIMEOUT if timeout is None else timeout
+    started = time.perf_counter()
+    futures = {name: _executor.submit(_timed, check) for name, check in CHECKS.items()}
+
+    results = {}
+    for name, future in futures.items():
+        # Probes run concurrently and share one deadline
+        remaining = max(0.0, timeout - (time.perf_counter() - started))
+        try:
+            results[name] = {"ok": True, "latency_ms": round(future.result(timeout=remaining) * 1000, 1)}
+        except TimeoutError:
+            future.cancel()
+            results[name] = {"ok": False, "latency_ms": None, "error": f"timed out after {timeout}s"}
+        except Exception as exc:
+            # Connection errors can name hosts and credentials: log them, don't serve them
+            logger.warning("Readiness probe %s failed", name, exc_info=True)
+            results[name] = {"ok": False, "latency_ms": None, "error": type(exc).__name__}
+    return results
+
+
+def recent_checks() -> dict:
+    """run_checks(), reused for HEALTHCHECK_INTERVAL seconds; concurrent callers share one run."""
+    with _run_lock:
+        at = _last_run["at"]
+        if at is None or time.monotonic() - at >= settings.HEALTHCHECK_INTERVAL:
+            _last_run["results"] = run_checks()
+            _last_run["at"] = time.monotonic()
+        return _last_run["results"]
+
+
+class HealthCheckMiddleware:
+    """Answer /healthz/ and /readyz/ before any other middleware runs."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = request.path_info
+        if path in HEALTHZ_PATHS:
+            response = HttpResponse("ok", content_type="text/plain")
+        elif path in READYZ_PATHS:
+            checks = recent_checks()
+            ready = all(check["ok"] for check in checks.values())
+            response = JsonResponse(
+                {"status": "ok" if ready else "degraded", "checks": checks},
+                status=200 if ready else 503,
+            )
+        else:
+            return self.get_response(request)
+        response["Cache-Control"] = "no-store"
+        return response
@@ -0,0 +1,219 @@
+# core/metrics.py
+"""
+Prometheus-style metrics without a metrics server or client library.
+
+Each process keeps its counters in memory and writes them to its own JSON
+file in METRICS_DIR at most every METRICS_FLUSH_SECONDS (and at exit). A
+scrape of /metrics sums every file in the directory, so the numbers cover
+all gunicorn workers, finished management commands (generate_availability)
+and restarted workers alike. Clear METRICS_DIR on deploy to reset them.
+
+Record:
+    metrics.inc("booking_attempts_total")
+    metrics.inc("slot_lookups_total", cache="hit")
+    metrics.observe("http_request_duration_seconds", 0.042, url_name="core_app:home")
+
+/metrics is answered by MetricsMiddleware ahead of the rest of the stack and
+needs "Authorization: Bearer <METRICS_TOKEN>"; it is off while the token is
+empty.
+"""
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+METRICS_PATHS = ("/metrics", "/metrics/")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name: (type, help); only these are exposed
+METRICS = {
+    "http_request_duration_seconds": ("histogram", "Request latency by URL name."),
+    "booking_attempts_total": ("counter", "Valid booking submissions."),
+    "booking_successes_total": ("counter", "Bookings committed."),
+    "booking_slot_conflicts_total": ("counter", "Bookings that lost their slot to another booking."),
+    "slot_lookups_total": ("counter", "Free-slot lookups, by slot cache result."),
+    "availability_rows_created_total": ("counter", "DayAvailability rows created by generate_availabilities."),
+    "booking_emails_total": ("counter", "Booking notification emails, by outcome."),
+    "cache_requests_total": ("counter", "Cache reads made while serving requests, by result."),
+}
+
+_lock = threading.Lock()
+_values = defaultdict(float)
+_state = {"pid": None, "filename": None, "flushed_at": 0.0}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _owned_values():
+    # A forked worker must not re-report what its parent recorded
+    if _state["pid"] != os.getpid():
+        _values.clear()
+        _state["pid"] = os.getpid()
+        _state["filename"] = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+    return _values
+
+
+def inc(name, amount=1, **labels) -> None:
+    with _lock:
+        _owned_values()[_key(name, labels)] += amount
+    _maybe_flush()
+
+
+def observe(name, value, buckets=DEFAULT_BUCKETS, **labels) -> None:
+    """Histogram observation: cumulative buckets, _sum and _count."""
+    with _lock:
+        values = _owned_values()
+        for bound in buckets:
+            if value <= bound:
+                values[_key(f"{name}_bucket", {**labels, "le": str(bound)})] += 1
+        values[_key(f"{name}_bucket", {**labels, "le": "+Inf"})] += 1
+        values[_key(f"{name}_sum", labels)] += value
+        values[_key(f"{name}_count", labels)] += 1
+    _maybe_flush()
+
+
+def _maybe_flush() -> None:
+    if time.monotonic() - _state["flushed_at"] >= settings.METRICS_FLUSH_SECONDS:
+        flush()
+
+
+def write_json(path, data) -> None:
+    """Atomically replace `path` in METRICS_DIR with `data` as JSON."""
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    # A temp file per write: concurrent flushes from other threads must not share one
+    fd, tmp = tempfile.mkstemp(dir=settings.METRICS_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def flush() -> None:
+    """Write this process's values to its file in METRICS_DIR."""
+    with _lock:
+        values = _owned_values()
+        if not values:
+            return
+        rows = [[name, dict(labels), value] for (name, labels), value in values.items()]
+        path = os.path.join(settings.METRICS_DIR, _state["filename"])
+        _state["flushed_at"] = time.monotonic()
+    try:
+        write_json(path, rows)
+    except OSError:
+        # Metrics must never fail the request
+        logger.warning("Could not write metrics to %s", path, exc_info=True)
+
+
+atexit.register(flush)
+
+
+def reset() -> None:
+    """Forget this process's values (tests)."""
+    with _lock:
+        _owned_values().clear()
+
+
+def collect() -> dict:
+    """{(sample name, labels): value} summed over every process's file."""
+    flush()
+    totals = defaultdict(float)
+    try:
+        names = [name for name in os.listdir(settings.METRICS_DIR) if name.endswith(".json")]
+    except OSError:
+        names = []
+    for filename in names:
+        try:
+            with open(os.path.join(settings.METRICS_DIR, filename), encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in rows:
+            totals[_key(name, labels)] += value
+    return totals
+
+
+def get_value(name, **labels) -> float:
+    """Current total of one sample across all processes."""
+    return collect().get(_key(name, labels), 0)
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _bucket_order(item):
+    (_, labels), _ = item
+    bound = dict(labels).get("le", "+Inf")
+    return [pair for pair in labels if pair[0] != "le"], float("inf") if bound == "+Inf" else float(bound)
+
+
+def render(totals=None) -> str:
+    """Text exposition format (version 0.0.4)."""
+    totals = collect() if totals is None else totals
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        sample_names = (f"{name}_bucket", f"{name}_sum", f"{name}_count") if kind == "histogram" else (name,)
+        for sample_name in sample_names:
+            samples = [item for item in totals.items() if item[0][0] == sample_name]
+            for (_, labels), value in sorted(samples, key=_bucket_order):
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+    hits = sum(v for (n, labels), v in totals.items() if n == "cache_requests_total" and ("result", "hit") in labels)
+    lookups = sum(v for (n, _), v in totals.items() if n == "cache_requests_total")
+    lines += [
+        "# HELP cache_hit_ratio Share of cache reads that were hits.",
+        "# TYPE cache_hit_ratio gauge",
+        f"cache_hit_ratio {_format_value(hits / lookups) if lookups else 'NaN'}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Serve /metrics (token required) before the rest of the stack."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path_info not in METRICS_PATHS:
+            return self.get_response(request)
+        token = settings.METRICS_TOKEN
+        if not token:
+            # Disabled: 404 like any unknown URL
+            return self.get_response(request)
+        auth = request.META.get("HTTP_AUTHORIZATION", "")
+        if not constant_time_compare(auth, f"Bearer {token}"):
+            response = HttpResponse("Unauthorized", status=401, content_type="text/plain")
+            response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+            return response
+        response = HttpResponse(render(), content_type=CONTENT_TYPE)
+        response["Cache-Control"] = "no-store"
+        return response
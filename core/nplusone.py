@@ -0,0 +1,119 @@
+# core/nplusone.py
+"""
+N+1 query detector for development and tests.
+
+Every SQL statement run inside detect() is recorded by its shape (the SQL
+text with placeholders, params dropped) together with where it came from:
+the template line being rendered, or else the first project frame on the
+stack. A shape repeated NPLUSONE_THRESHOLD times or more is reported.
+
+Tests:
+    with assert_no_n_plus_one():
+        self.client.get(url)
+
+Development (DEBUG only): add "core.nplusone.NPlusOneMiddleware" to
+MIDDLEWARE to log every offending request to the "core.nplusone" logger
+(or raise, with NPLUSONE_RAISE = True).
+"""
+import logging
+import sys
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+IGNORED_PREFIXES = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+class NPlusOneError(AssertionError):
+    """Raised when the same query shape repeats within one request/block."""
+
+
+def _origin():
+    """Template line being rendered, else the innermost project frame."""
+    project_frame = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        node = frame.f_locals.get("self")
+        # type(), not isinstance(): the latter would evaluate lazy objects (request.user)
+        if issubclass(type(node), Node) and getattr(node, "token", None) and node.origin:
+            return f"{node.origin.template_name or node.origin.name}:{node.token.lineno}"
+        filename = frame.f_code.co_filename
+        if (
+            project_frame is None
+            and filename.startswith(str(settings.BASE_DIR))
+            and "site-packages" not in filename
+            and not filename.endswith("nplusone.py")
+        ):
+            project_frame = f"{filename[len(str(settings.BASE_DIR)) + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return project_frame or "unknown"
+
+
+class QueryShapeRecorder:
+    def __init__(self):
+        self.shapes = defaultdict(list)
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(IGNORED_PREFIXES):
+            self.shapes[sql].append(_origin())
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold=None):
+        """[(sql, count, sorted origins)] for shapes seen `threshold`+ times."""
+        threshold = threshold or settings.NPLUSONE_THRESHOLD
+        return [
+            (sql, len(origins), sorted(set(origins)))
+            for sql, origins in self.shapes.items()
+            if len(origins) >= threshold
+        ]
+
+
+def format_report(repeated) -> str:
+    lines = []
+    for sql, count, origins in repeated:
+        lines.append(f"{count}x {sql[:200]}")
+        lines.extend(f"    from {origin}" for origin in origins)
+    return "\n".join(lines)
+
+
+@contextmanager
+def detect(using="default"):
+    recorder = QueryShapeRecorder()
+    with connections[using].execute_wrapper(recorder):
+        yield recorder
+
+
+@contextmanager
+def assert_no_n_plus_one(threshold=None, using="default"):
+    with detect(using) as recorder:
+        yield recorder
+    repeated = recorder.repeated(threshold)
+    if repeated:
+        raise NPlusOneError("Repeated queries (N+1?):\n" + format_report(repeated))
+
+
+class NPlusOneMiddleware:
+    """DEBUG-only: report repeated query shapes per request."""
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect() as recorder:
+            response = self.get_response(request)
+
+        repeated = recorder.repeated()
+        if repeated:
+            report = format_report(repeated)
+            if settings.NPLUSONE_RAISE:
+                raise NPlusOneError(f"{request.method} {request.path}\n{report}")
+            logger.warning("N+1 queries on %s %s\n%s", request.method, request.path, report)
+        return response
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+import tempfile
 from urllib.parse import urlparse
 
 from dotenv import load_dotenv
@@ -143,9 +144,10 @@ if DEBUG:
 # Middleware
 # ------------------------------------------------------------
 MIDDLEWARE = [
+    "core.timing.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "core.middleware.CanonicalHostMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core_app.prerender.PrerenderWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -158,6 +160,28 @@ MIDDLEWARE = [
 if DEBUG:
     MIDDLEWARE = ["debug_toolbar.middleware.DebugToolbarMiddleware", *MIDDLEWARE]
     INTERNAL_IPS = env_list("INTERNAL_IPS", ["127.0.0.1"])
+    if env_bool("NPLUSONE_DETECT", True):
+        MIDDLEWARE.append("core.nplusone.NPlusOneMiddleware")
+    if env_bool("DEFERRED_FIELDS_DETECT", True):
+        MIDDLEWARE.append("core.deferred.DeferredFieldMiddleware")
+
+# First of all (debug toolbar included): health checks skip the whole stack
+MIDDLEWARE.insert(0, "core.health.HealthCheckMiddleware")
+HEALTHCHECK_TIMEOUT = float(env("HEALTHCHECK_TIMEOUT", "2"))
+HEALTHCHECK_INTERVAL = float(env("HEALTHCHECK_INTERVAL", "5"))
+# Request timings (core/timing.py): sampled log lines + per-route rollup in METRICS_DIR
+REQUEST_TIMING_SAMPLE_RATE = float(env("REQUEST_TIMING_SAMPLE_RATE", "0.01"))
+# /metrics (core/metrics.py): off while METRICS_TOKEN is empty
+MIDDLEWARE.insert(1, "core.metrics.MetricsMiddleware")
+METRICS_TOKEN = env("METRICS_TOKEN", "")
+METRICS_DIR = env("METRICS_DIR", os.path.join(tempfile.gettempdir(), "clinic-metrics"))
+METRICS_FLUSH_SECONDS = int(env("METRICS_FLUSH_SECONDS", "5"))
+
+# N+1 detector (core/nplusone.py): DEBUG middleware and test helper
+NPLUSONE_THRESHOLD = int(env("NPLUSONE_THRESHOLD", "3"))
+NPLUSONE_RAISE = env_bool("NPLUSONE_RAISE", False)
+# Deferred-field detector (core/deferred.py)
+DEFERRED_FIELDS_RAISE = env_bool("DEFERRED_FIELDS_RAISE", False)
 
 # ------------------------------------------------------------
 # Templates  (FIXED: your version had broken brackets)
@@ -220,6 +244,11 @@ MEDIA_ROOT = BASE_DIR / "media"
 # If you hit "Missing staticfiles manifest entry" you can temporarily set:
 # WHITENOISE_MANIFEST_STRICT = False
 
+# Prerendered landing pages (manage.py prerender_pages, core_app/prerender.py)
+PRERENDER_ROOT = BASE_DIR / "prerendered"
+PRERENDER_MANIFEST = BASE_DIR / "prerendered.json"
+PRERENDER_MAX_AGE = int(env("PRERENDER_MAX_AGE", "86400"))
+
 # ------------------------------------------------------------
 # Cache (Redis optional)
 # ------------------------------------------------------------
@@ -236,6 +265,12 @@ if REDIS_URL:
 else:
     CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
+# Prerendered pages are validated against model versions in the cache, which
+# only match the prerender_pages run when the cache is shared (Redis)
+if env_bool("PRERENDER_PAGES", not DEBUG) and REDIS_URL and PRERENDER_ROOT.is_dir():
+    WHITENOISE_ROOT = PRERENDER_ROOT
+    WHITENOISE_INDEX_FILE = True
+
 # ------------------------------------------------------------
 # Auth redirects
 # ------------------------------------------------------------
@@ -291,6 +326,27 @@ DOCTOR_NOTIFICATION_EMAIL = env("DOCTOR_NOTIFICATION_EMAIL", "hakeemolaosebikan3
 APPOINTMENT_DAY_START = env("APPOINTMENT_DAY_START", "09:00")
 APPOINTMENT_DAY_END = env("APPOINTMENT_DAY_END", "17:00")
 APPOINTMENT_LOOKAHEAD_DAYS = int(env("APPOINTMENT_LOOKAHEAD_DAYS", "60"))
+# Short without Redis: other workers' bookings can't invalidate a per-process cache
+APPOINTMENT_SLOT_CACHE_TIMEOUT = int(env("APPOINTMENT_SLOT_CACHE_TIMEOUT", "600" if REDIS_URL else "15"))
+APPOINTMENT_SLOT_HOLD_SECONDS = int(env("APPOINTMENT_SLOT_HOLD_SECONDS", "300"))
+# Hold requests per client IP per minute (appointments/holds.py)
+APPOINTMENT_HOLD_RATE_LIMIT = int(env("APPOINTMENT_HOLD_RATE_LIMIT", "20"))
+# Also the lifetime of the schedule version behind the feed's ETag (appointments/cache.py)
+APPOINTMENT_ICS_CACHE_TIMEOUT = int(env("APPOINTMENT_ICS_CACHE_TIMEOUT", "86400" if REDIS_URL else "60"))
+DOCTOR_DASHBOARD_CACHE_TIMEOUT = int(env("DOCTOR_DASHBOARD_CACHE_TIMEOUT", "300"))
+# Invalidation is a delete, which only reaches other workers through Redis
+DOCTOR_PROFILE_CACHE_TIMEOUT = int(env("DOCTOR_PROFILE_CACHE_TIMEOUT", "86400" if REDIS_URL else "15"))
+# Upper bound on a worker's stale SiteSettings when the cache is not shared
+SITE_SETTINGS_SNAPSHOT_SECONDS = int(env("SITE_SETTINGS_SNAPSHOT_SECONDS", "60"))
+# Deploy identifier: part of every page cache key and HTTP validator
+RELEASE_VERSION = env("RELEASE_VERSION", env("RENDER_GIT_COMMIT", ""))
+# Public pages are keyed by model versions, so with Redis the timeout only bounds
+# memory; without it other workers never see a bump and the timeout bounds staleness
+FULL_PAGE_CACHE_TIMEOUT = int(env("FULL_PAGE_CACHE_TIMEOUT", str(7 * 86400) if REDIS_URL else "15"))
+# Sitemap XML is keyed by model versions too (same staleness bound without Redis);
+# past the limit a section is split
+SITEMAP_CACHE_TIMEOUT = int(env("SITEMAP_CACHE_TIMEOUT", str(7 * 86400) if REDIS_URL else "60"))
+SITEMAP_SECTION_LIMIT = int(env("SITEMAP_SECTION_LIMIT", "10000"))
 
 # ------------------------------------------------------------
 # Logging
@@ -303,6 +359,7 @@ LOGGING = {
     "loggers": {
         "django.request": {"handlers": ["console"], "level": "ERROR", "propagate": False},
         "appointments": {"handlers": ["console"], "level": "INFO", "propagate": False},
+        "core.timing": {"handlers": ["console"], "level": "INFO", "propagate": False},
     },
 }
 WHITENOISE_MANIFEST_STRICT = False
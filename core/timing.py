@@ -0,0 +1,259 @@
+# core/timing.py
+"""
+Per-request performance instrumentation, safe to run in production.
+
+ServerTimingMiddleware measures, for every request:
+  db      query count and time (connection.execute_wrapper)
+  cache   get/get_many hits and misses, and time spent in cache calls
+  render  TemplateResponse render time (templates rendered by the view
+          itself, e.g. render(), count as view time)
+  total   time spent in the rest of the stack, view included
+
+and reports it three ways:
+  - a Server-Timing header for staff users (and everyone under DEBUG),
+    shown in the browser's network panel;
+  - a JSON log line on the "core.timing" logger for a
+    REQUEST_TIMING_SAMPLE_RATE fraction of requests;
+  - a per-route rollup (sums per URL pattern) kept in the file-backed
+    store of core.metrics, so every worker's requests are summed whatever
+    the cache backend; see `manage.py request_timings`;
+  - the latency histogram and cache counters on /metrics (core.metrics).
+"""
+import json
+import logging
+import os
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED_ROUTE = "(unresolved)"
+ROLLUP_PREFIX = "request_timing_"
+# Totals at the last `request_timings --reset`; not *.json, so not a worker file
+ROLLUP_BASELINE = "request-timings.baseline"
+TIMED_CACHE_METHODS = ("set", "add", "set_many", "delete", "delete_many", "incr", "decr", "touch")
+
+_MISSING = object()
+
+
+class RequestTimings:
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.cache_depth = 0
+        self.render_time = 0.0
+        self.total_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def server_timing(self) -> str:
+        return ", ".join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'cache;dur={self.cache_time * 1000:.1f};desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f"render;dur={self.render_time * 1000:.1f}",
+            f"total;dur={self.total_time * 1000:.1f}",
+        ])
+
+    def rollup_values(self) -> dict:
+        return {
+            "count": 1,
+            "total_us": int(self.total_time * 1e6),
+            "db_queries": self.db_queries,
+            "db_us": int(self.db_time * 1e6),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_us": int(self.cache_time * 1e6),
+            "render_us": int(self.render_time * 1e6),
+        }
+
+
+def _timed_cache_call(timings, method, count=None):
+    """
+    Wrap a cache method to add its time (and, via `count`, its hits and
+    misses) to `timings`. Only the outermost call records: base backends
+    implement get_many(), get_or_set() etc. on top of get()/add().
+    """
+    def wrapper(*args, **kwargs):
+        if timings.cache_depth:
+            return method(*args, **kwargs)
+        timings.cache_depth += 1
+        started = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        finally:
+            timings.cache_time += time.perf_counter() - started
+            timings.cache_depth -= 1
+        if count:
+            count(args, kwargs, result)
+        return result
+    return wrapper
+
+
+def _count_get(timings):
+    def count(args, kwargs, value):
+        if value is _MISSING:
+            timings.cache_misses += 1
+        else:
+            timings.cache_hits += 1
+    return count
+
+
+def _count_get_many(timings):
+    def count(args, kwargs, found):
+        timings.cache_hits += len(found)
+        timings.cache_misses += len(args[0]) - len(found)
+    return count
+
+
+def _counting_get(timings, method):
+    # Ask for a sentinel default so a miss is told apart from a cached None
+    timed = _timed_cache_call(timings, method, _count_get(timings))
+
+    def get(key, default=None, **kwargs):
+        value = timed(key, _MISSING, **kwargs)
+        return default if value is _MISSING else value
+    return get
+
+
+def _counting_get_many(timings, method):
+    timed = _timed_cache_call(timings, method, _count_get_many(timings))
+
+    def get_many(keys, **kwargs):
+        return timed(list(keys), **kwargs)
+    return get_many
+
+
+@contextmanager
+def instrument_caches(timings):
+    """
+    Count cache calls made in this thread. Cache backends are per thread,
+    so the methods are shadowed on this thread's instances only.
+    """
+    patched = []
+    for alias in settings.CACHES:
+        backend = caches[alias]
+        wrappers = {name: _timed_cache_call(timings, getattr(backend, name)) for name in TIMED_CACHE_METHODS}
+        wrappers["get"] = _counting_get(timings, backend.get)
+        wrappers["get_many"] = _counting_get_many(timings, backend.get_many)
+        for name, wrapper in wrappers.items():
+            setattr(backend, name, wrapper)
+        patched.append((backend, wrappers))
+    try:
+        yield timings
+    finally:
+        for backend, wrappers in patched:
+            for name in wrappers:
+                delattr(backend, name)
+
+
+def add_to_rollup(route, timings) -> None:
+    for field, value in timings.rollup_values().items():
+        metrics.inc(f"{ROLLUP_PREFIX}{field}", value, route=route)
+
+
+def _rollup_totals() -> dict:
+    """{(route, field): sum} over every worker's metrics file."""
+    return {
+        (dict(labels)["route"], name[len(ROLLUP_PREFIX):]): value
+        for (name, labels), value in metrics.collect().items()
+        if name.startswith(ROLLUP_PREFIX)
+    }
+
+
+def _baseline_path() -> str:
+    return os.path.join(settings.METRICS_DIR, ROLLUP_BASELINE)
+
+
+def get_rollup() -> dict:
+    """{route: {field: sum}} since the last reset_rollup()."""
+    try:
+        with open(_baseline_path(), encoding="utf-8") as f:
+            baseline = {(route, field): value for route, field, value in json.load(f)}
+    except (OSError, ValueError):
+        baseline = {}
+    result = defaultdict(dict)
+    for (route, field), value in _rollup_totals().items():
+        result[route][field] = int(value - baseline.get((route, field), 0))
+    return {route: sums for route, sums in result.items() if sums.get("count", 0) > 0}
+
+
+def reset_rollup() -> None:
+    """Start the rollup over; worker files keep their totals, so record them as the baseline."""
+    metrics.write_json(
+        _baseline_path(),
+        [[route, field, value] for (route, field), value in _rollup_totals().items()],
+    )
+
+
+class ServerTimingMiddleware:
+    """Time every request; see the module docstring."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        request._timings = timings
+        started = time.perf_counter()
+        with connections["default"].execute_wrapper(timings), instrument_caches(timings):
+            response = self.get_response(request)
+        timings.total_time = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else UNRESOLVED_ROUTE
+        add_to_rollup(route, timings)
+        self.record_metrics(match.view_name if match else UNRESOLVED_ROUTE, timings)
+
+        if random.random() < settings.REQUEST_TIMING_SAMPLE_RATE:
+            logger.info(json.dumps({
+                "method": request.method,
+                "route": route,
+                "status": response.status_code,
+                **timings.rollup_values(),
+            }))
+        if self.shows_timing(request):
+            response["Server-Timing"] = timings.server_timing()
+        return response
+
+    def process_template_response(self, request, response):
+        started = time.perf_counter()
+
+        def rendered(response):
+            request._timings.render_time += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def record_metrics(url_name, timings) -> None:
+        metrics.observe("http_request_duration_seconds", timings.total_time, url_name=url_name)
+        if timings.cache_hits:
+            metrics.inc("cache_requests_total", timings.cache_hits, result="hit")
+        if timings.cache_misses:
+            metrics.inc("cache_requests_total", timings.cache_misses, result="miss")
+
+    @staticmethod
+    def shows_timing(request) -> bool:
+        if settings.DEBUG:
+            return True
+        # Only look the user up when there is a session to find one in
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES or not hasattr(request, "user"):
+            return False
+        return request.user.is_staff
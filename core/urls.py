@@ -3,19 +3,9 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
-from core_app.sitemaps import StaticViewSitemap, DoctorProfileSitemap, PublicationSitemap, StaticPageSitemap
-from core_app.views import HealthzView
-
-sitemaps = {
-    "static": StaticViewSitemap,
-    "profiles": DoctorProfileSitemap,
-    "publications": PublicationSitemap,
-    "pages": StaticPageSitemap,
-}
+from core_app.views import SitemapView
 
 urlpatterns = [
-    path("healthz/", HealthzView.as_view(), name="healthz"),
     path('admin/', admin.site.urls),
     path('accounts/', include(("accounts.urls", "accounts"), namespace="accounts")),
     path("doctor/", include(("profiles.urls", "profiles"), namespace="profiles")),
@@ -23,7 +13,8 @@ urlpatterns = [
     path('appointments/', include('appointments.urls')),
     path('', include(('core_app.urls', 'core_app'), namespace='core_app')),
     path('blog/', include(('blog.urls', 'blog'), namespace='blog')),
-    path("sitemap.xml", sitemap, {"sitemaps": sitemaps}, name="django.contrib.sitemaps.views.sitemap"),
+    path("sitemap.xml", SitemapView.as_view(), name="sitemap"),
+    path("sitemap-<slug:section>.xml", SitemapView.as_view(), name="sitemap_section"),
 ]
 
 if settings.DEBUG:
@@ -1,6 +1,17 @@
 # core_app/context_processors.py
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
 from .models import SiteSettings
 
+# Shared version of the active SiteSettings row; bumped by core_app.signals
+SITE_SETTINGS_VERSION_KEY = "site_settings:ver"
+
+# Process-local snapshot: (version, SiteSettings or None, loaded at)
+_snapshot = (None, None, 0.0)
+
 DEFAULT_SITE_SETTINGS = {
     # Brand
     "clinic_name": "Pain, Arthritis, Autoimmune & Rheumatology Clinic",
@@ -56,6 +67,38 @@ def _og_image_url(obj):
     img = getattr(obj, "og_image", None)
     return getattr(img, "url", None) if img else None
 
+def bump_site_settings_version():
+    cache.set(SITE_SETTINGS_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_active_site_settings():
+    """
+    Active SiteSettings (or None), kept per process and revalidated against
+    the version key: one cache read and no query in steady state.
+
+    The version key only reaches other workers through a shared cache
+    (Redis). The snapshot is also reloaded every SITE_SETTINGS_SNAPSHOT_SECONDS,
+    so with the per-process LocMemCache an edit made in one worker shows up
+    in the others within that time.
+    """
+    global _snapshot
+
+    version = cache.get(SITE_SETTINGS_VERSION_KEY)
+    if version is None:
+        cache.add(SITE_SETTINGS_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(SITE_SETTINGS_VERSION_KEY)
+
+    cached_version, obj, loaded_at = _snapshot
+    fresh = time.monotonic() - loaded_at < settings.SITE_SETTINGS_SNAPSHOT_SECONDS
+    if cached_version is not None and cached_version == version and fresh:
+        return obj
+
+    # Read under the version seen above; a concurrent bump reloads next time
+    obj = SiteSettings.objects.filter(is_active=True).first()
+    _snapshot = (version, obj, time.monotonic())
+    return obj
+
+
 def clinic_context(request):
     """
     Global clinic branding + SEO defaults.
@@ -67,7 +110,7 @@ def clinic_context(request):
       - meta: always a dict
     """
 
-    obj = SiteSettings.objects.filter(is_active=True).first()
+    obj = get_active_site_settings()
     site_settings = obj or DEFAULT_SITE_SETTINGS
 
     # Values based on your model fields (with safe fallbacks)
@@ -0,0 +1,121 @@
+# core_app/management/commands/prerender_pages.py
+import gzip
+import os
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from core_app.pagecache import PAGE_CACHE_MODELS, get_model_versions
+from core_app.prerender import (
+    HOME_ROUTE,
+    PRERENDER_ROUTES,
+    content_hash,
+    load_manifest,
+    page_path,
+    save_manifest,
+)
+
+
+def render_page(url):
+    """`url` rendered for an anonymous visitor, without the middleware stack."""
+    match = resolve(url)
+    site = urlsplit(settings.SITE_URL)
+    request = RequestFactory().get(url, HTTP_HOST=site.netloc, secure=site.scheme == "https")
+    request.user = AnonymousUser()
+
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    if response.status_code != 200:
+        raise CommandError(f"{url} returned {response.status_code}")
+    return response.content
+
+
+def _replace(path, data):
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def write_page(root, url, content) -> bool:
+    """Write the page (+ .gz) unless the file already holds `content`."""
+    path = page_path(root, url)
+    try:
+        with open(path, "rb") as f:
+            if f.read() == content:
+                return False
+    except OSError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    # mtime=0 keeps the .gz byte-identical for identical pages
+    _replace(path + ".gz", gzip.compress(content, compresslevel=9, mtime=0))
+    _replace(path, content)
+    return True
+
+
+def remove_page(root, url) -> None:
+    path = page_path(root, url)
+    for target in (path, path + ".gz"):
+        if os.path.exists(target):
+            os.remove(target)
+
+
+class Command(BaseCommand):
+    help = (
+        "Prerender the constant landing pages to PRERENDER_ROOT for WhiteNoise. "
+        "Run on every deploy after collectstatic (templates and static URLs are baked in); "
+        "pages whose content changed since are served live until the next run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--include-home",
+            action="store_true",
+            help="Also prerender the home page.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Don't write anything; exit with an error if any page is out of date.",
+        )
+
+    def handle(self, *args, **options):
+        root = settings.PRERENDER_ROOT
+        if not settings.REDIS_URL:
+            self.stderr.write(self.style.WARNING(
+                "REDIS_URL is not set: without a shared cache the web workers cannot match "
+                "the recorded versions, so the prerendered pages will not be served."
+            ))
+        routes = PRERENDER_ROUTES + ((HOME_ROUTE,) if options["include_home"] else ())
+        previous = load_manifest()
+        manifest, outdated = {}, []
+
+        for name in routes:
+            url = reverse(name)
+            labels = getattr(resolve(url).func.view_class, "page_cache_models", PAGE_CACHE_MODELS)
+            # Read before rendering: a concurrent edit then leaves a mismatch, never a stale match
+            versions = get_model_versions(labels)
+            content = render_page(url)
+            digest = content_hash(content)
+            manifest[url] = {"sha256": digest, "models": list(labels), "versions": versions}
+
+            if options["check"]:
+                if previous.get(url) != manifest[url]:
+                    outdated.append(url)
+                continue
+            written = write_page(root, url, content)
+            self.stdout.write(f"{'written  ' if written else 'unchanged'} {url} {digest[:12]}")
+
+        if options["check"]:
+            if outdated:
+                raise CommandError("Prerendered pages out of date: " + ", ".join(outdated))
+            self.stdout.write(self.style.SUCCESS(f"{len(manifest)} prerendered page(s) up to date."))
+            return
+
+        for url in previous.keys() - manifest.keys():
+            remove_page(root, url)
+        save_manifest(manifest)
+        self.stdout.write(self.style.SUCCESS(f"Prerendered {len(manifest)} page(s) to {root}."))
@@ -0,0 +1,53 @@
+# core_app/management/commands/request_timings.py
+from django.core.management.base import BaseCommand
+
+from core.timing import UNRESOLVED_ROUTE, get_rollup, reset_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-route request timings collected by core.timing.ServerTimingMiddleware "
+        "in METRICS_DIR (averages since the last --reset, slowest routes first). "
+        "Workers add their numbers every METRICS_FLUSH_SECONDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sort",
+            choices=["total", "count", "db", "render"],
+            default="total",
+            help="Order by summed total time (default), request count, DB time or render time.",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Clear the collected timings.",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            reset_rollup()
+            self.stdout.write(self.style.SUCCESS("Request timings cleared."))
+            return
+
+        rollup = get_rollup()
+        if not rollup:
+            self.stdout.write("No request timings collected yet.")
+            return
+
+        sort_field = {"total": "total_us", "count": "count", "db": "db_us", "render": "render_us"}[options["sort"]]
+        self.stdout.write(
+            f"{'requests':>9} {'avg ms':>8} {'db q':>6} {'db ms':>7} {'render ms':>9} {'cache hit':>9}  route"
+        )
+        for route, sums in sorted(rollup.items(), key=lambda item: -item[1].get(sort_field, 0)):
+            count = sums["count"]
+            lookups = sums.get("cache_hits", 0) + sums.get("cache_misses", 0)
+            hit_rate = f"{100 * sums.get('cache_hits', 0) / lookups:.0f}%" if lookups else "-"
+            self.stdout.write(
+                f"{count:>9} "
+                f"{sums.get('total_us', 0) / count / 1000:>8.1f} "
+                f"{sums.get('db_queries', 0) / count:>6.1f} "
+                f"{sums.get('db_us', 0) / count / 1000:>7.1f} "
+                f"{sums.get('render_us', 0) / count / 1000:>9.1f} "
+                f"{hit_rate:>9}  {route if route == UNRESOLVED_ROUTE else '/' + route}"
+            )
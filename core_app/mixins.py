@@ -31,6 +31,14 @@ class SEOMixin:
     def get_seo_robots(self):
         return self.seo_robots
 
+    def get_object(self, queryset=None):
+        # Resolved once per request and shared by the view and all SEO hooks
+        if queryset is not None:
+            return super().get_object(queryset)
+        if getattr(self, "_seo_object", None) is None:
+            self._seo_object = super().get_object()
+        return self._seo_object
+
     def get_meta(self):
         return build_meta(
             title=self.get_seo_title(),
@@ -0,0 +1,203 @@
+# core_app/pagecache.py
+"""
+Anonymous full-page cache keyed by model versions.
+
+Each content model has a version counter in the cache, bumped after commit
+on every save/delete (see core_app.signals). A cached page's key is the URL
+plus the versions of the models it depends on, so pages can stay cached for
+as long as nothing they show changes, and are never served stale.
+
+That holds only when every process shares the cache (REDIS_URL): under the
+per-process LocMemCache a bump reaches just the worker that made it, so
+FULL_PAGE_CACHE_TIMEOUT then defaults to 15 seconds and bounds how long the
+other workers serve the old page.
+
+ConditionalDetailMixin builds HTTP validators from the object's updated_at
+and the models' updated_at in the database instead, so every worker agrees
+on them whether or not the cache is shared.
+"""
+import hashlib
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .context_processors import get_active_site_settings
+
+# Models whose content appears on the public pages (the site settings are on all of them)
+PAGE_CACHE_MODELS = (
+    "core_app.SiteSettings",
+    "profiles.DoctorProfile",
+    "appointments.Service",
+    "publications.Achievement",
+    "publications.Publication",
+)
+# Every model with a version counter (core_app.signals bumps these)
+VERSIONED_MODELS = (*PAGE_CACHE_MODELS, "blog.Post", "core_app.StaticPage")
+
+
+def _version_key(label) -> str:
+    return f"modelver:{label.lower()}"
+
+
+def bump_model_version(label) -> None:
+    cache.set(_version_key(label), time.time_ns(), timeout=None)
+
+
+def get_model_version_values(labels) -> list:
+    """Version counters (time_ns) for `labels`, seeding any missing one."""
+    keys = [_version_key(label) for label in labels]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def get_model_versions(labels) -> str:
+    """Composite version string for `labels`."""
+    return ".".join(str(version) for version in get_model_version_values(labels))
+
+
+def get_model_timestamps(labels) -> list:
+    """
+    (latest updated_at, row count) for each model in `labels`, from the
+    database; the count catches deletes. The site settings come from the
+    process's snapshot, i.e. the row the page is rendered with.
+    """
+    stamps = []
+    for label in labels:
+        if label == "core_app.SiteSettings":
+            obj = get_active_site_settings()
+            stamps.append((obj.updated_at if obj else None, int(obj is not None)))
+            continue
+        row = apps.get_model(label)._default_manager.aggregate(latest=Max("updated_at"), rows=Count("pk"))
+        stamps.append((row["latest"], row["rows"]))
+    return stamps
+
+
+def page_key(request, versions) -> str:
+    # Path only: query strings are not cached (see page_is_cacheable)
+    url = f"{request.scheme}://{request.get_host()}{request.path}"
+    url = hashlib.md5(url.encode()).hexdigest()
+    # The release is part of the version: a deploy may change every template
+    versions = f"{versions}:{settings.RELEASE_VERSION}"
+    return f"page:{url}:{hashlib.md5(versions.encode()).hexdigest()}"
+
+
+def serves_anonymous_copy(request) -> bool:
+    """GET/HEAD from an anonymous visitor with no flash messages pending."""
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.user.is_authenticated
+        and not getattr(request, "htmx", False)
+        # Flash messages are per visitor
+        and not len(get_messages(request))
+    )
+
+
+class VersionedPageCacheMixin:
+    """
+    Serve GET/HEAD for anonymous visitors from the page cache.
+    Set `page_cache_models` to the model labels the page depends on.
+    """
+
+    page_cache_models = PAGE_CACHE_MODELS
+
+    def page_is_cacheable(self, request) -> bool:
+        # One entry per query string would let anyone flood the cache
+        return serves_anonymous_copy(request) and not request.GET
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.page_is_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = page_key(request, get_model_versions(self.page_cache_models))
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response["X-Page-Cache"] = "hit"
+            return response
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            def store(rendered):
+                cache.set(
+                    key,
+                    (rendered.content, rendered["Content-Type"]),
+                    timeout=settings.FULL_PAGE_CACHE_TIMEOUT,
+                )
+
+            if hasattr(response, "add_post_render_callback"):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+            response["X-Page-Cache"] = "miss"
+        return response
+
+
+class ConditionalDetailMixin:
+    """
+    DetailView mixin for conditional GET. The validator is the object's
+    `last_modified_field`, read with one indexed lookup on the URL's pk/slug,
+    plus the latest updated_at of `conditional_models` (the site settings are
+    on every page; see get_model_timestamps) and the release. A matching
+    If-None-Match / If-Modified-Since is answered 304 before the object is
+    loaded or the template rendered.
+    Anonymous visitors only: the page differs for logged-in users.
+    """
+
+    last_modified_field = "updated_at"
+    conditional_models = ("core_app.SiteSettings",)
+
+    def get_last_modified_value(self):
+        """`last_modified_field` of the requested object, or None if there is none."""
+        queryset = self.get_queryset()
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+        if slug is not None and (pk is None or self.query_pk_and_slug):
+            queryset = queryset.filter(**{self.get_slug_field(): slug})
+        return queryset.values_list(self.last_modified_field, flat=True).first()
+
+    def get_validators(self):
+        """(etag, last_modified timestamp), or (None, None) for a missing object."""
+        updated_at = self.get_last_modified_value()
+        if updated_at is None:
+            return None, None
+        stamps = get_model_timestamps(self.conditional_models)
+        raw = "|".join(
+            [updated_at.isoformat(), *(f"{latest}:{rows}" for latest, rows in stamps), settings.RELEASE_VERSION]
+        )
+        etag = f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+        last_modified = max([updated_at, *(latest for latest, _ in stamps if latest is not None)])
+        return etag, int(last_modified.timestamp())
+
+    def dispatch(self, request, *args, **kwargs):
+        if not serves_anonymous_copy(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators()
+        if etag is None:
+            # Let the view raise its 404
+            return super().dispatch(request, *args, **kwargs)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            # Revalidate every time; a 304 costs one lookup
+            patch_cache_control(response, no_cache=True)
+            patch_vary_headers(response, ("Cookie",))
+        return response
@@ -0,0 +1,109 @@
+# core_app/prerender.py
+"""
+Prerendered landing pages served by WhiteNoise.
+
+`manage.py prerender_pages` renders the constant condition pages (and
+optionally the home page) as an anonymous visitor into PRERENDER_ROOT as
+<path>/index.html (+ .gz), and records each page's content hash and the
+pagecache model versions it was rendered from in PRERENDER_MANIFEST.
+
+PrerenderWhiteNoiseMiddleware replaces WhiteNoiseMiddleware. It serves a
+prerendered page, before sessions, auth and template rendering, only when:
+  - the request is an anonymous-looking GET/HEAD (no session or messages
+    cookie, not htmx), and
+  - the versions of the models the page shows still match the manifest.
+A SiteSettings/content edit therefore falls back to the live view (and its
+page cache) until the next `prerender_pages` run; stale HTML is never served.
+
+The versions live in the cache, so they only match the ones recorded by
+`prerender_pages` when every process shares it: the feature is enabled
+(WHITENOISE_ROOT set) only with REDIS_URL. Under the per-process
+LocMemCache each worker would seed its own versions and never match.
+"""
+import hashlib
+import json
+import os
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .pagecache import get_model_versions
+
+PRERENDER_ROUTES = (
+    "core_app:ra_treatment",
+    "core_app:gout_treatment",
+    "core_app:lupus_care",
+    "core_app:joint_pain_clinic",
+    "core_app:autoimmune_specialist",
+    "core_app:faq",
+    "core_app:contact_location",
+)
+HOME_ROUTE = "core_app:home"
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def page_path(root, url):
+    return os.path.join(str(root), url.strip("/"), "index.html")
+
+
+def load_manifest(path=None) -> dict:
+    """{url: {"sha256", "models", "versions"}}; empty if never prerendered."""
+    try:
+        with open(path or settings.PRERENDER_MANIFEST, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, path=None) -> None:
+    path = str(path or settings.PRERENDER_MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+class PrerenderWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware for STATIC_ROOT plus the prerendered pages in
+    WHITENOISE_ROOT (see the module docstring for when those are served).
+    """
+
+    def __init__(self, get_response=None, settings=settings):
+        root = getattr(settings, "WHITENOISE_ROOT", None)
+        self.prerendered = load_manifest(settings.PRERENDER_MANIFEST) if root else {}
+        super().__init__(get_response, settings)
+
+    def add_cache_headers(self, headers, path, url):
+        entry = self.prerendered.get(url)
+        if entry is None:
+            return super().add_cache_headers(headers, path, url)
+        # Content hash, not mtime: identical across instances and deploys
+        headers["ETag"] = f'"{entry["sha256"][:32]}"'
+        headers["Cache-Control"] = f"max-age={settings.PRERENDER_MAX_AGE}, public"
+
+    def serves_prerendered(self, request, entry) -> bool:
+        return (
+            request.method in ("GET", "HEAD")
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and CookieStorage.cookie_name not in request.COOKIES
+            and "HTTP_HX_REQUEST" not in request.META
+            and get_model_versions(entry["models"]) == entry["versions"]
+        )
+
+    def __call__(self, request):
+        path = request.path_info
+        if path.startswith(self.static_prefix):
+            return super().__call__(request)
+
+        entry = self.prerendered.get(path)
+        if entry is None or not self.serves_prerendered(request, entry):
+            return self.get_response(request)
+        response = super().__call__(request)
+        # Logged-in visitors get the live page from the same URL
+        patch_vary_headers(response, ("Cookie",))
+        return response
@@ -0,0 +1,27 @@
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .context_processors import bump_site_settings_version
+from .models import SiteSettings
+from .pagecache import VERSIONED_MODELS, bump_model_version
+
+
+@receiver(post_save, sender=SiteSettings)
+@receiver(post_delete, sender=SiteSettings)
+def invalidate_site_settings(sender, instance, **kwargs):
+    # After commit, so no worker can reload the old row under the new version
+    transaction.on_commit(bump_site_settings_version)
+
+
+def invalidate_cached_pages(sender, instance, **kwargs):
+    transaction.on_commit(partial(bump_model_version, sender._meta.label))
+
+
+for label in VERSIONED_MODELS:
+    model = apps.get_model(label)
+    post_save.connect(invalidate_cached_pages, sender=model, dispatch_uid=f"pagecache-save-{label}")
+    post_delete.connect(invalidate_cached_pages, sender=model, dispatch_uid=f"pagecache-delete-{label}")
@@ -1,12 +1,45 @@
+"""
+Sitemaps, served pre-rendered from the cache.
+
+The XML for /sitemap.xml and each /sitemap-<section>.xml is rendered once
+and cached as bytes under the versions of the models listed in it (bumped by
+core_app.signals), so crawler hits cost one cache read until content changes.
+Without a shared cache (REDIS_URL) other workers never see the bump, so
+SITEMAP_CACHE_TIMEOUT then defaults to a minute instead of a week.
+
+While every section fits in SITEMAP_SECTION_LIMIT URLs, /sitemap.xml is one
+urlset; past that it becomes a sitemap index of the per-section files.
+"""
+import hashlib
+
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps import views as sitemap_views
+from django.core.cache import cache
 from django.urls import reverse
 
+from blog.models import Post
 from core_app.models import StaticPage
+from core_app.pagecache import get_model_versions
 from profiles.models import DoctorProfile
 from publications.models import Publication
 
+SITEMAP_MODELS = (
+    "profiles.DoctorProfile",
+    "publications.Publication",
+    "core_app.StaticPage",
+    "blog.Post",
+)
+CACHED_HEADERS = ("Content-Type", "Last-Modified", "X-Robots-Tag")
+
 
-class StaticViewSitemap(Sitemap):
+class SectionSitemap(Sitemap):
+    @property
+    def limit(self):
+        return settings.SITEMAP_SECTION_LIMIT
+
+
+class StaticViewSitemap(SectionSitemap):
     changefreq = "weekly"
     priority = 0.9
 
@@ -24,13 +57,14 @@ class StaticViewSitemap(Sitemap):
             "appointments:book",
             "publications:publication_list",
             "publications:achievements",
+            "blog:post_list",
         ]
 
     def location(self, item):
         return reverse(item)
 
 
-class DoctorProfileSitemap(Sitemap):
+class DoctorProfileSitemap(SectionSitemap):
     changefreq = "monthly"
     priority = 0.8
 
@@ -45,7 +79,7 @@ class DoctorProfileSitemap(Sitemap):
         return obj.updated_at
 
 
-class PublicationSitemap(Sitemap):
+class PublicationSitemap(SectionSitemap):
     changefreq = "monthly"
     priority = 0.7
 
@@ -53,13 +87,14 @@ class PublicationSitemap(Sitemap):
         return (
             Publication.objects
             .filter(is_published=True)
-            .only("slug")
+            .only("slug", "updated_at")
         )
 
-    
+    def lastmod(self, obj):
+        return obj.updated_at
 
 
-class StaticPageSitemap(Sitemap):
+class StaticPageSitemap(SectionSitemap):
     changefreq = "monthly"
     priority = 0.6
 
@@ -68,7 +103,70 @@ class StaticPageSitemap(Sitemap):
             StaticPage.objects
             .filter(is_published=True)
             .only("slug", "updated_at")
+            .order_by("slug")
         )
 
     def lastmod(self, obj):
-        return obj.updated_at
\ No newline at end of file
+        return obj.updated_at
+
+
+class PostSitemap(SectionSitemap):
+    changefreq = "weekly"
+    priority = 0.6
+
+    def items(self):
+        return (
+            Post.objects
+            .filter(is_published=True)
+            .only("slug", "updated_at")
+        )
+
+    def lastmod(self, obj):
+        return obj.updated_at
+
+
+SITEMAPS = {
+    "static": StaticViewSitemap,
+    "profiles": DoctorProfileSitemap,
+    "publications": PublicationSitemap,
+    "pages": StaticPageSitemap,
+    "blog": PostSitemap,
+}
+
+
+def needs_index() -> bool:
+    """True once any section spans more than one page of SITEMAP_SECTION_LIMIT."""
+    return any(sitemap().paginator.num_pages > 1 for sitemap in SITEMAPS.values())
+
+
+def sitemap_key(request, section, page) -> str:
+    versions = f"{get_model_versions(SITEMAP_MODELS)}:{settings.RELEASE_VERSION}"
+    return (
+        f"sitemap:{request.scheme}:{request.get_host()}:{section or '-'}:{page}:"
+        f"{hashlib.md5(versions.encode()).hexdigest()}"
+    )
+
+
+def render_sitemap(request, section=None):
+    """(content, headers) for /sitemap.xml (section=None) or one section."""
+    if section is None and needs_index():
+        response = sitemap_views.index(request, SITEMAPS, sitemap_url_name="sitemap_section")
+    else:
+        response = sitemap_views.sitemap(request, SITEMAPS, section=section)
+    response.render()
+    return response.content, {name: response[name] for name in CACHED_HEADERS if response.has_header(name)}
+
+
+def get_sitemap(request, section=None):
+    """Cached render_sitemap(); raises Http404 for an unknown section or page."""
+    try:
+        page = int(request.GET.get("p", 1))
+    except ValueError:
+        # Not cached: one key per junk value would flood the cache
+        return render_sitemap(request, section)
+    key = sitemap_key(request, section, page)
+    cached = cache.get(key)
+    if cached is None:
+        cached = render_sitemap(request, section)
+        cache.set(key, cached, timeout=settings.SITEMAP_CACHE_TIMEOUT)
+    return cached
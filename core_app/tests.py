@@ -1,3 +1,590 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.template.loader import render_to_string
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from appointments.models import Service
+from blog.models import Post
+from core import health, metrics
+from core.deferred import assert_no_deferred_loads
+from core.timing import RequestTimings, get_rollup, instrument_caches
+from core_app.context_processors import clinic_context, get_active_site_settings
+from core_app.models import SiteSettings, StaticPage
+from core_app.pagecache import bump_model_version
+from core_app.prerender import PRERENDER_ROUTES, PrerenderWhiteNoiseMiddleware, load_manifest, page_path
+from core_app.views import HomeView
+from profiles.models import DoctorProfile
+from publications.models import Achievement, Publication
+
+User = get_user_model()
+
+
+class DeferredFieldProjectionTest(TestCase):
+    """Pages built on .only() querysets must not lazily load deferred fields."""
+
+    @classmethod
+    def setUpTestData(cls):
+        doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            first_name="Hakeem",
+            last_name="Olaosebikan",
+            role=User.ROLE_DOCTOR,
+        )
+        cls.profile = DoctorProfile.objects.create(
+            user=doctor,
+            full_name="Hakeem Olaosebikan",
+            specialization="Rheumatology",
+            years_of_experience=10,
+            bio="Rheumatologist.",
+        )
+        for i in range(3):
+            Service.objects.create(doctor=doctor, name=f"Service {i}", duration_minutes=30)
+            Achievement.objects.create(doctor=doctor, title=f"Award {i}", year=2020 + i, description="Details")
+            Publication.objects.create(doctor=doctor, title=f"Paper {i}", journal="Journal", year=2020 + i)
+            Post.objects.create(title=f"Post {i}", content="Body", author=doctor)
+        cls.publication = Publication.objects.first()
+
+    def setUp(self):
+        cache.clear()
+
+    def _get(self, url):
+        with assert_no_deferred_loads():
+            response = self.client.get(url, HTTP_HOST="localhost:8000")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_home(self):
+        self._get(reverse("core_app:home"))
+
+    def test_home_achievements_component(self):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        ctx = HomeView.as_view()(request).context_data
+
+        with assert_no_deferred_loads():
+            html = render_to_string("core_app/components/achievements.html", ctx)
+        self.assertIn("Details", html)
+
+    def test_about_doctor(self):
+        self._get(reverse("core_app:about_doctor"))
+
+    def test_doctor_profile(self):
+        self._get(self.profile.get_absolute_url())
+
+    def test_publication_list_and_detail(self):
+        self._get(reverse("publications:publication_list"))
+        self._get(self.publication.get_absolute_url())
+
+    def test_achievements(self):
+        self._get(reverse("publications:achievements"))
+
+    def test_blog_list(self):
+        self._get(reverse("blog:post_list"))
+
+
+class SiteSettingsContextCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get("/")
+
+    def test_steady_state_serves_zero_queries(self):
+        SiteSettings.objects.create(clinic_name="First Clinic")
+        clinic_context(self.request)
+
+        with self.assertNumQueries(0):
+            ctx = clinic_context(self.request)
+        self.assertEqual(ctx["clinic_name"], "First Clinic")
+
+    def test_save_and_delete_invalidate_the_snapshot(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_row = SiteSettings.objects.create(clinic_name="First Clinic")
+        clinic_context(self.request)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_row.clinic_name = "Renamed Clinic"
+            settings_row.save()
+        self.assertEqual(clinic_context(self.request)["clinic_name"], "Renamed Clinic")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            settings_row.delete()
+        self.assertIsInstance(clinic_context(self.request)["site_settings"], dict)
+
+    def test_snapshot_expires_without_a_version_bump(self):
+        # An edit made by another worker whose bump this process cannot see
+        SiteSettings.objects.create(clinic_name="First Clinic")
+        clinic_context(self.request)
+        SiteSettings.objects.update(clinic_name="Renamed Clinic")
+
+        self.assertEqual(clinic_context(self.request)["clinic_name"], "First Clinic")
+        with override_settings(SITE_SETTINGS_SNAPSHOT_SECONDS=0):
+            self.assertEqual(clinic_context(self.request)["clinic_name"], "Renamed Clinic")
+
+
+class VersionedPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = User.objects.create_user(username="doctor1", password="pass123", role=User.ROLE_DOCTOR)
+
+    def _get(self, url):
+        return self.client.get(url, HTTP_HOST="localhost:8000")
+
+    def test_anonymous_page_served_from_cache(self):
+        url = reverse("core_app:home")
+        self.assertEqual(self._get(url)["X-Page-Cache"], "miss")
+
+        with self.assertNumQueries(0):
+            response = self._get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Page-Cache"], "hit")
+
+    def test_content_change_invalidates(self):
+        url = reverse("core_app:home")
+        self._get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Service.objects.create(doctor=self.doctor, name="New service", duration_minutes=30)
+
+        response = self._get(url)
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "New service")
+
+    def test_logged_in_users_bypass_the_cache(self):
+        self.client.force_login(self.doctor)
+        url = reverse("core_app:gout_treatment")
+        self._get(url)
+
+        self.assertNotIn("X-Page-Cache", self._get(url))
+
+    def test_query_strings_are_not_cached(self):
+        url = reverse("core_app:gout_treatment")
+        self._get(url)
+
+        response = self._get(f"{url}?x=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Page-Cache", response)
+        self.assertEqual(len([key for key in cache._cache if ":page:" in key]), 1)
+
+
+class PrerenderPagesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = os.path.join(tmp.name, "prerendered")
+        paths = override_settings(PRERENDER_ROOT=self.root, PRERENDER_MANIFEST=os.path.join(tmp.name, "m.json"))
+        paths.enable()
+        self.addCleanup(paths.disable)
+
+    def _prerender(self, *args):
+        out = StringIO()
+        call_command("prerender_pages", *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def _middleware(self):
+        with override_settings(WHITENOISE_ROOT=self.root, WHITENOISE_INDEX_FILE=True, WHITENOISE_AUTOREFRESH=False):
+            return PrerenderWhiteNoiseMiddleware(lambda request: HttpResponse("live"))
+
+    def test_writes_pages_and_skips_unchanged(self):
+        self._prerender()
+        manifest = load_manifest()
+        self.assertEqual(set(manifest), {reverse(name) for name in PRERENDER_ROUTES})
+        faq = page_path(self.root, reverse("core_app:faq"))
+        self.assertTrue(os.path.isfile(faq + ".gz"))
+        with open(faq, "rb") as f:
+            self.assertIn(b"<html", f.read())
+
+        self.assertNotIn("written", self._prerender())
+        self._prerender("--check")
+
+    def test_check_fails_when_content_changed(self):
+        self._prerender()
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteSettings.objects.create(clinic_name="Renamed Clinic", is_active=True)
+        with self.assertRaises(CommandError):
+            self._prerender("--check")
+
+    def test_middleware_serves_anonymous_get(self):
+        self._prerender()
+        middleware = self._middleware()
+        url = reverse("core_app:faq")
+
+        with self.assertNumQueries(0):
+            response = middleware(RequestFactory().get(url))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'"{load_manifest()[url]["sha256"][:32]}"')
+        self.assertIn("Cookie", response["Vary"])
+
+        revalidated = middleware(RequestFactory().get(url, HTTP_IF_NONE_MATCH=response["ETag"]))
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_middleware_falls_back_to_live_view(self):
+        self._prerender()
+        middleware = self._middleware()
+        url = reverse("core_app:faq")
+
+        factory = RequestFactory()
+        factory.cookies["sessionid"] = "abc"
+        self.assertEqual(middleware(factory.get(url)).content, b"live")
+        self.assertEqual(middleware(RequestFactory().get(reverse("core_app:contact"))).content, b"live")
+
+        bump_model_version("core_app.SiteSettings")
+        self.assertEqual(middleware(RequestFactory().get(url)).content, b"live")
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="pass123")
+        cls.page = StaticPage.objects.create(title="Privacy", content="Text")
+        cls.post = Post.objects.create(title="Post", content="Body", author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def _get(self, url, **headers):
+        return self.client.get(url, HTTP_HOST="localhost:8000", **headers)
+
+    def test_matching_etag_is_answered_304_without_rendering(self):
+        # The object's updated_at, + the other posts' for a post
+        budgets = {self.page.get_absolute_url(): 1, self.post.get_absolute_url(): 2}
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                response = self._get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("no-cache", response["Cache-Control"])
+
+                with self.assertNumQueries(budget):
+                    revalidated = self._get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+                self.assertEqual(revalidated.status_code, 304)
+
+                revalidated = self._get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+                self.assertEqual(revalidated.status_code, 304)
+
+    def test_object_or_site_settings_change_updates_validator(self):
+        url = self.page.get_absolute_url()
+        etag = self._get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteSettings.objects.create(clinic_name="Clinic", is_active=True)
+        response = self._get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        self.page.content = "Updated"
+        self.page.save()
+        self.assertContains(self._get(url, HTTP_IF_NONE_MATCH=response["ETag"]), "Updated")
+
+    def test_other_posts_change_the_post_validator(self):
+        url = self.post.get_absolute_url()
+        etag = self._get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title="Newer", content="Body", author=self.user)
+        self.assertEqual(self._get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_validator_does_not_depend_on_the_cache(self):
+        # No on_commit callbacks: as if the change was made in another
+        # worker whose version bumps this process never sees
+        url = self.post.get_absolute_url()
+        etag = self._get(url)["ETag"]
+
+        Post.objects.create(title="Newer", content="Body", author=self.user)
+        self.assertEqual(self._get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_logged_in_and_missing_pages_are_not_conditional(self):
+        self.assertEqual(self._get(reverse("core_app:static_page", args=["missing"])).status_code, 404)
+
+        self.client.force_login(self.user)
+        self.assertNotIn("ETag", self._get(self.page.get_absolute_url()))
+
+
+class SitemapTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = User.objects.create_user(username="doctor1", password="pass123", role=User.ROLE_DOCTOR)
+        cls.publication = Publication.objects.create(doctor=cls.doctor, title="Paper", journal="Journal", year=2020)
+        cls.post = Post.objects.create(title="First post", content="Body", author=cls.doctor)
+
+    def setUp(self):
+        cache.clear()
+
+    def _get(self, url):
+        return self.client.get(url, HTTP_HOST="localhost:8000")
+
+    def test_sitemap_is_cached_until_content_changes(self):
+        response = self._get(reverse("sitemap"))
+        self.assertContains(response, self.post.get_absolute_url())
+        self.assertContains(response, f"{self.publication.get_absolute_url()}</loc><lastmod>")
+        self.assertEqual(response["Content-Type"], "application/xml")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get(reverse("sitemap")).content, response.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            newer = Post.objects.create(title="Second post", content="Body", author=self.doctor)
+        self.assertContains(self._get(reverse("sitemap")), newer.get_absolute_url())
+
+    @override_settings(SITEMAP_SECTION_LIMIT=1)
+    def test_large_section_switches_to_an_index(self):
+        Post.objects.create(title="Second post", content="Body", author=self.doctor)
+
+        response = self._get(reverse("sitemap"))
+        self.assertContains(response, "<sitemapindex")
+        self.assertContains(response, "/sitemap-blog.xml?p=2")
+
+        page = self._get(reverse("sitemap_section", args=["blog"]) + "?p=2")
+        self.assertContains(page, "<urlset")
+        self.assertEqual(self._get(reverse("sitemap_section", args=["blog"]) + "?p=3").status_code, 404)
+        self.assertEqual(self._get(reverse("sitemap_section", args=["missing"])).status_code, 404)
+
+
+@override_settings(HEALTHCHECK_INTERVAL=0)
+class HealthCheckTest(TestCase):
+    @override_settings(DEBUG=False, ALLOWED_HOSTS=["www.example.com"])
+    def test_healthz_skips_the_stack(self):
+        # Any host, no canonical redirect, no queries
+        with self.assertNumQueries(0):
+            response = self.client.get("/healthz/", HTTP_HOST="10.0.0.7:8000")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"ok")
+        self.assertEqual(response["Cache-Control"], "no-store")
+
+    def test_readyz_reports_each_dependency(self):
+        response = self.client.get("/readyz/", HTTP_HOST="10.0.0.7:8000")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["status"], "ok")
+        self.assertEqual(set(body["checks"]), {"database", "cache"})
+        self.assertTrue(all(check["ok"] and check["latency_ms"] is not None for check in body["checks"].values()))
+
+    @override_settings(HEALTHCHECK_TIMEOUT=0.2)
+    def test_readyz_degraded_on_error_or_timeout(self):
+        def broken():
+            raise ConnectionError("refused")
+
+        def hung():
+            time.sleep(1)
+
+        with mock.patch.dict(health.CHECKS, {"database": broken, "cache": hung}):
+            response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 503)
+        checks = response.json()["checks"]
+        # Class name only: connection errors can carry hosts and credentials
+        self.assertEqual(checks["database"]["error"], "ConnectionError")
+        self.assertIn("timed out", checks["cache"]["error"])
+
+    @override_settings(HEALTHCHECK_INTERVAL=60)
+    def test_readyz_probes_at_most_once_per_interval(self):
+        calls = []
+        health._last_run["at"] = None
+        self.addCleanup(health._last_run.update, at=None)
+
+        with mock.patch.dict(health.CHECKS, {"database": lambda: calls.append(1), "cache": lambda: None}):
+            for _ in range(3):
+                self.assertEqual(self.client.get("/readyz/").status_code, 200)
+        self.assertEqual(len(calls), 1)
+
+
+class ServerTimingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        overrides = override_settings(METRICS_DIR=tmp.name, METRICS_FLUSH_SECONDS=0)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # Drop what earlier tests' requests recorded in this process
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def _get(self, url):
+        return self.client.get(url, HTTP_HOST="localhost:8000")
+
+    def test_header_for_staff_only(self):
+        url = reverse("core_app:gout_treatment")
+        self.assertNotIn("Server-Timing", self._get(url))
+
+        staff = User.objects.create_user(username="staff", password="pass123", is_staff=True)
+        self.client.force_login(staff)
+        header = self._get(url)["Server-Timing"]
+        for metric in ("db;dur=", "cache;dur=", "render;dur=", "total;dur="):
+            self.assertIn(metric, header)
+
+    def test_cache_hits_and_misses(self):
+        cache.set("present", 1)
+        timings = RequestTimings()
+        with instrument_caches(timings):
+            self.assertEqual(cache.get("present"), 1)
+            self.assertEqual(cache.get("absent", "fallback"), "fallback")
+            cache.get_many(["present", "absent"])
+        self.assertEqual((timings.cache_hits, timings.cache_misses), (2, 2))
+        # Methods are only shadowed while instrumented
+        self.assertNotIn("get", vars(cache._connections[cache._alias]))
+
+    def test_per_route_rollup(self):
+        page = StaticPage.objects.create(title="Privacy", content="Text")
+        self._get(page.get_absolute_url())
+        self._get(page.get_absolute_url())
+
+        sums = get_rollup()["pages/<slug:slug>/"]
+        self.assertEqual(sums["count"], 2)
+        self.assertGreater(sums["db_queries"], 0)
+        self.assertGreater(sums["render_us"], 0)
+
+        out = StringIO()
+        call_command("request_timings", stdout=out)
+        self.assertIn("/pages/<slug:slug>/", out.getvalue())
+
+        call_command("request_timings", "--reset", stdout=StringIO())
+        self.assertEqual(get_rollup(), {})
+
+    def test_rollup_sums_every_worker_file(self):
+        # What another process (e.g. a gunicorn worker) flushed
+        with open(os.path.join(self.dir, "other-worker.json"), "w") as f:
+            f.write('[["request_timing_count", {"route": "faq/"}, 3], ["request_timing_total_us", {"route": "faq/"}, 9000]]')
+
+        out = StringIO()
+        call_command("request_timings", stdout=out)
+        self.assertIn("/faq/", out.getvalue())
+        self.assertEqual(get_rollup()["faq/"], {"count": 3, "total_us": 9000})
+
+
+class MetricsEndpointTest(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        overrides = override_settings(METRICS_DIR=tmp.name, METRICS_FLUSH_SECONDS=0, METRICS_TOKEN="s3cret")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        # Keep this test's samples out of the shared METRICS_DIR at exit
+        self.addCleanup(metrics.reset)
+
+    def _scrape(self, **headers):
+        return self.client.get("/metrics", HTTP_HOST="10.0.0.7:9090", **headers)
+
+    def test_token_required(self):
+        self.assertEqual(self._scrape().status_code, 401)
+        self.assertEqual(self._scrape(HTTP_AUTHORIZATION="Bearer wrong").status_code, 401)
+        with override_settings(METRICS_TOKEN=""):
+            # Disabled: an ordinary unknown URL
+            response = self.client.get("/metrics", HTTP_HOST="localhost:8000", HTTP_AUTHORIZATION="Bearer ")
+            self.assertEqual(response.status_code, 404)
+
+    def test_exposes_request_histogram_and_cache_ratio(self):
+        self.client.get(reverse("core_app:gout_treatment"), HTTP_HOST="localhost:8000")
+
+        response = self._scrape(HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn('http_request_duration_seconds_bucket{le="+Inf",url_name="core_app:gout_treatment"}', body)
+        self.assertIn('http_request_duration_seconds_count{url_name="core_app:gout_treatment"}', body)
+        self.assertIn("# TYPE cache_hit_ratio gauge", body)
+
+    def test_sums_every_worker_file(self):
+        before = metrics.get_value("booking_attempts_total")
+        with open(os.path.join(self.dir, "other-worker.json"), "w") as f:
+            f.write('[["booking_attempts_total", {}, 5]]')
+
+        self.assertEqual(metrics.get_value("booking_attempts_total"), before + 5)
+
+
+class SEOViewQueryCountTest(TestCase):
+    """
+    Query budgets for every SEOMixin view: the SEO hooks must share the
+    view's object instead of looking it up again.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            first_name="Hakeem",
+            last_name="Olaosebikan",
+            role=User.ROLE_DOCTOR,
+        )
+        cls.patient = User.objects.create_user(username="patient1", password="pass123")
+        cls.profile = DoctorProfile.objects.create(
+            user=cls.doctor,
+            full_name="Hakeem Olaosebikan",
+            specialization="Rheumatology",
+            years_of_experience=10,
+            bio="Rheumatologist.",
+        )
+        Service.objects.create(doctor=cls.doctor, name="Consultation", duration_minutes=30)
+        Achievement.objects.create(doctor=cls.doctor, title="Award", year=2020)
+        cls.publication = Publication.objects.create(doctor=cls.doctor, title="Paper", journal="Journal", year=2020)
+        cls.post = Post.objects.create(title="Post", content="Body", author=cls.doctor)
+        cls.page = StaticPage.objects.create(title="Privacy", content="Text")
+
+    def setUp(self):
+        cache.clear()
+        # Site settings are loaded once per process; keep them out of the budgets
+        get_active_site_settings()
+
+    def _count(self, url, user=None):
+        if user:
+            self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_HOST="localhost:8000")
+        self.assertEqual(response.status_code, 200, url)
+        return len(ctx)
+
+    def test_detail_views(self):
+        # One lookup of the object, shared by get() and every SEO hook,
+        # + the conditional-GET validator lookup where the view has one
+        budgets = {
+            self.page.get_absolute_url(): 2,
+            self.profile.get_absolute_url(): 2,
+            self.publication.get_absolute_url(): 1,
+            self.post.get_absolute_url(): 4,  # + recent posts, + their updated_at for the validator
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertEqual(self._count(url), budget)
+
+    def test_list_and_page_views(self):
+        budgets = {
+            reverse("core_app:home"): 3,
+            reverse("core_app:contact"): 0,
+            reverse("core_app:about_doctor"): 0,
+            reverse("core_app:gout_treatment"): 0,
+            reverse("publications:publication_list"): 2,
+            reverse("publications:achievements"): 2,
+            reverse("blog:post_list"): 2,
+            reverse("appointments:book"): 1,
+            reverse("appointments:success"): 0,
+            reverse("accounts:register"): 0,
+            reverse("accounts:login"): 1,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertEqual(self._count(url), budget)
+
+    def test_authenticated_views(self):
+        # Session + user lookups included
+        budgets = [
+            (reverse("accounts:password_change"), self.patient, 2),
+            (reverse("accounts:password_change_done"), self.patient, 2),
+            (reverse("accounts:patient-dashboard"), self.patient, 4),
+            (reverse("accounts:doctor-dashboard"), self.doctor, 5),
+        ]
+        for url, user, budget in budgets:
+            with self.subTest(url=url):
+                self.assertEqual(self._count(url, user), budget)
@@ -7,7 +7,6 @@ from .views import (
     ContactView,
     FAQPageView,
     GoutPageView,
-    HealthzView,
     HomeView,
     JointPainPageView,
     LupusPageView,
@@ -71,5 +70,4 @@ urlpatterns = [
     path("contact/", ContactView.as_view(), name="contact"),
     path("pages/<slug:slug>/", StaticPageDetailView.as_view(), name="static_page"),
     path("robots.txt", RobotsTxtView.as_view(), name="robots"),
-    path("healthz/", HealthzView.as_view(), name="healthz"),
 ]
\ No newline at end of file
@@ -5,7 +5,9 @@ from django.views.generic import DetailView, TemplateView
 from appointments.models import Service
 from core_app.mixins import SEOMixin
 from core_app.models import StaticPage
-from profiles.models import DoctorProfile
+from core_app.pagecache import ConditionalDetailMixin, VersionedPageCacheMixin
+from core_app.sitemaps import get_sitemap
+from profiles.cache import get_active_doctor_profile
 from publications.models import Achievement, Publication
 
 from django.http import FileResponse, Http404
@@ -13,35 +15,7 @@ from django.conf import settings
 from pathlib import Path
 
 
-def get_active_doctor_profile():
-    """
-    Single-doctor clinic helper.
-    Returns the active doctor profile or None.
-    """
-    return (
-        DoctorProfile.objects
-        .select_related("user")
-        .filter(is_active=True)
-        .only(
-            "id",
-            "user_id",
-            "slug",
-            "title",
-            "full_name",
-            "specialization",
-            "years_of_experience",
-            "bio",
-            "profile_photo",
-            "hospital_affiliations",
-            "professional_memberships",
-            "user__first_name",
-            "user__last_name",
-        )
-        .first()
-    )
-
-
-class HomeView(SEOMixin, TemplateView):
+class HomeView(VersionedPageCacheMixin, SEOMixin, TemplateView):
     template_name = "core_app/home.html"
     seo_title = "Pain, Arthritis, Autoimmune & Rheumatology Clinic — Dr Olaosebikan"
     seo_description = (
@@ -65,7 +39,7 @@ class HomeView(SEOMixin, TemplateView):
         ctx["achievements"] = (
             Achievement.objects
             .filter(is_published=True)
-            .only("id", "title", "year")
+            .only("id", "title", "description", "year")
             .order_by("-year", "-created_at")[:4]
         )
 
@@ -80,21 +54,21 @@ class HomeView(SEOMixin, TemplateView):
             ctx["services"] = (
                 Service.objects
                 .filter(is_active=True, doctor_id=doctor.user_id)
-                .only("id", "name", "description", "duration_minutes", "position")
+                .only("id", "name", "description", "icon", "duration_minutes", "position")
                 .order_by("position", "name")[:6]
             )
         else:
             ctx["services"] = (
                 Service.objects
                 .filter(is_active=True)
-                .only("id", "name", "description", "duration_minutes", "position")
+                .only("id", "name", "description", "icon", "duration_minutes", "position")
                 .order_by("position", "name")[:6]
             )
 
         return ctx
 
 
-class StaticPageDetailView(SEOMixin, DetailView):
+class StaticPageDetailView(ConditionalDetailMixin, SEOMixin, DetailView):
     model = StaticPage
     template_name = "pages/cms_page.html"
     context_object_name = "page"
@@ -130,7 +104,7 @@ class StaticPageDetailView(SEOMixin, DetailView):
         return "WebPage"
 
 
-class ContactView(SEOMixin, TemplateView):
+class ContactView(VersionedPageCacheMixin, SEOMixin, TemplateView):
     template_name = "core_app/contact.html"
     seo_title = "Contact — Pain, Arthritis, Autoimmune & Rheumatology Clinic"
     seo_description = "Contact the clinic via phone, WhatsApp, email, and social channels."
@@ -143,7 +117,7 @@ class ContactView(SEOMixin, TemplateView):
         )
 
 
-class AboutDoctorPageView(SEOMixin, TemplateView):
+class AboutDoctorPageView(VersionedPageCacheMixin, SEOMixin, TemplateView):
     template_name = "pages/about_doctor.html"
     seo_schema_type = "AboutPage"
 
@@ -168,7 +142,7 @@ class AboutDoctorPageView(SEOMixin, TemplateView):
         return ctx
 
 
-class RheumatoidArthritisPageView(SEOMixin, TemplateView):
+class RheumatoidArthritisPageView(VersionedPageCacheMixin, SEOMixin, TemplateView):
     template_name = "pages/rheumatoid_arthritis.html"
     seo_schema_type = "MedicalWebPage"
 
@@ -188,7 +162,7 @@ class RheumatoidArthritisPageView(SEOMixin, TemplateView):
         )
 
 
-class GoutPageView(SEOMixin, TemplateView):
+class GoutPageView(VersionedPageCacheMixin, SEOMixin, TemplateView):
     template_name = "pages/gout_treatment.html"
     seo_schema_type = "MedicalWebPage"
 
@@ -208,7 +182,7 @@ class GoutPageView(SEOMixin, TemplateView):
         )
 
 
-class LupusPageView(SEOMixin, TemplateView):
+class LupusPageView(VersionedPageCacheMixin, SEOMixin, TemplateView):
     template_name = "pages/lupus_care.html"
     seo_schema_type = "MedicalWebPage"
 
@@ -228,7 +202,7 @@ class LupusPageView(SEOMixin, TemplateView):
         )
 
 
-class JointPainPageView(SEOMixin, TemplateView):
+class JointPainPageView(VersionedPageCacheMixin, SEOMixin, TemplateView):
     template_name = "pages/joint_pain_clinic.html"
     seo_schema_type = "MedicalWebPage"
 
@@ -248,7 +222,7 @@ class JointPainPageView(SEOMixin, TemplateView):
         )
 
 
-class AutoimmuneSpecialistPageView(SEOMixin, TemplateView):
+class AutoimmuneSpecialistPageView(VersionedPageCacheMixin, SEOMixin, TemplateView):
     template_name = "pages/autoimmune_specialist.html"
     seo_schema_type = "MedicalWebPage"
 
@@ -268,7 +242,7 @@ class AutoimmuneSpecialistPageView(SEOMixin, TemplateView):
         )
 
 
-class FAQPageView(SEOMixin, TemplateView):
+class FAQPageView(VersionedPageCacheMixin, SEOMixin, TemplateView):
     template_name = "pages/faq.html"
     seo_schema_type = "FAQPage"
 
@@ -288,7 +262,7 @@ class FAQPageView(SEOMixin, TemplateView):
         )
 
 
-class ContactLocationPageView(SEOMixin, TemplateView):
+class ContactLocationPageView(VersionedPageCacheMixin, SEOMixin, TemplateView):
     template_name = "pages/contact_location.html"
     seo_schema_type = "ContactPage"
 
@@ -319,10 +293,17 @@ class RobotsTxtView(View):
         ]
         return HttpResponse("\n".join(lines), content_type="text/plain")
 
-class HealthzView(View):
-    def get(self, request, *args, **kwargs):
-        return HttpResponse("ok", content_type="text/plain")
-    
+class SitemapView(View):
+    """/sitemap.xml and /sitemap-<section>.xml from the cached XML."""
+
+    def get(self, request, section=None, *args, **kwargs):
+        content, headers = get_sitemap(request, section)
+        response = HttpResponse(content)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+
 class GoogleVerificationFileView(View):
     filename = "googlef8a66bd5cc73324b.html"
 
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from .cache import invalidate_active_doctor_profile
 from .models import DoctorProfile
 
 @admin.register(DoctorProfile)
@@ -16,5 +17,7 @@ class DoctorProfileAdmin(admin.ModelAdmin):
 
     def save_model(self, request, obj, form, change):
         if obj.is_active:
+            # update() sends no signals
             DoctorProfile.objects.exclude(pk=obj.pk).update(is_active=False)
+            invalidate_active_doctor_profile()
         super().save_model(request, obj, form, change)
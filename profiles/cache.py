@@ -0,0 +1,110 @@
+# profiles/cache.py
+"""
+Cached snapshot of the active doctor profile.
+
+The single-doctor pages (home, about) need the same handful of fields on
+every request. They are cached as a compact tuple of raw values under
+PROFILE_CACHE_KEY and rebuilt with Model.from_db(), so fields outside the
+snapshot stay deferred exactly as with .only(). profiles.signals and
+DoctorProfileAdmin invalidate the key after commit.
+
+The delete only reaches other workers through a shared cache; without
+REDIS_URL, DOCTOR_PROFILE_CACHE_TIMEOUT defaults to 15 seconds and bounds
+how long they show the profile from before an edit.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import DoctorProfile
+
+PROFILE_CACHE_KEY = "doctor_profile_main"
+STATS_HITS_KEY = "doctor_profile:stats:hits"
+STATS_MISSES_KEY = "doctor_profile:stats:misses"
+
+PROFILE_FIELDS = (
+    "id",
+    "user_id",
+    "slug",
+    "title",
+    "full_name",
+    "specialization",
+    "years_of_experience",
+    "bio",
+    "profile_photo",
+    "hospital_affiliations",
+    "professional_memberships",
+)
+USER_FIELDS = ("id", "first_name", "last_name")
+
+# Cached when there is no active profile, so that case is not a miss every time
+NO_PROFILE = ()
+
+
+def _incr(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def _load_snapshot():
+    row = (
+        DoctorProfile.objects
+        .filter(is_active=True)
+        .values_list(*PROFILE_FIELDS, *(f"user__{f}" for f in USER_FIELDS))
+        .first()
+    )
+    return tuple(row) if row else NO_PROFILE
+
+
+def _from_snapshot(snapshot):
+    profile_values = snapshot[:len(PROFILE_FIELDS)]
+    user_values = snapshot[len(PROFILE_FIELDS):]
+
+    # "user_id" is the attname from_db expects for the FK column
+    profile = DoctorProfile.from_db("default", list(PROFILE_FIELDS), profile_values)
+    profile.user = get_user_model().from_db("default", list(USER_FIELDS), user_values)
+    return profile
+
+
+def get_active_doctor_profile():
+    """
+    Single-doctor clinic helper.
+    Returns the active doctor profile or None.
+    """
+    snapshot = cache.get(PROFILE_CACHE_KEY)
+    if snapshot is None:
+        _incr(STATS_MISSES_KEY)
+        snapshot = _load_snapshot()
+        cache.set(PROFILE_CACHE_KEY, snapshot, timeout=settings.DOCTOR_PROFILE_CACHE_TIMEOUT)
+    else:
+        _incr(STATS_HITS_KEY)
+
+    if snapshot == NO_PROFILE:
+        return None
+    return _from_snapshot(snapshot)
+
+
+def invalidate_active_doctor_profile() -> None:
+    # After commit, so a concurrent request cannot re-cache the old row
+    transaction.on_commit(lambda: cache.delete(PROFILE_CACHE_KEY))
+
+
+def cached_user_id():
+    """User id the cached snapshot belongs to, or None."""
+    snapshot = cache.get(PROFILE_CACHE_KEY)
+    return snapshot[PROFILE_FIELDS.index("user_id")] if snapshot else None
+
+
+def stats() -> dict:
+    hits = cache.get(STATS_HITS_KEY) or 0
+    misses = cache.get(STATS_MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": (hits / total) if total else 0.0,
+    }
@@ -1,8 +1,19 @@
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.core.cache import cache
+
+from .cache import cached_user_id, invalidate_active_doctor_profile
 from .models import DoctorProfile
 
+
 @receiver(post_save, sender=DoctorProfile)
+@receiver(post_delete, sender=DoctorProfile)
 def clear_doctor_profile_cache(sender, instance, **kwargs):
-    cache.delete("doctor_profile_main")
+    invalidate_active_doctor_profile()
+
+
+@receiver(post_save, sender=get_user_model())
+def clear_doctor_profile_cache_for_user(sender, instance, **kwargs):
+    # The snapshot carries the doctor's name from the user row
+    if instance.pk == cached_user_id():
+        invalidate_active_doctor_profile()
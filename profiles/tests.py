@@ -1,3 +1,83 @@
-from django.test import TestCase
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
 
-# Create your tests here.
+from core.deferred import assert_no_deferred_loads
+from profiles import cache as profile_cache
+from profiles.admin import DoctorProfileAdmin
+from profiles.cache import get_active_doctor_profile
+from profiles.models import DoctorProfile
+
+User = get_user_model()
+
+
+class ActiveDoctorProfileCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="doctor1",
+            password="pass123",
+            first_name="Hakeem",
+            last_name="Olaosebikan",
+            role=User.ROLE_DOCTOR,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile = DoctorProfile.objects.create(
+                user=self.user,
+                full_name="Hakeem Olaosebikan",
+                specialization="Rheumatology",
+                years_of_experience=10,
+                bio="Rheumatologist.",
+            )
+
+    def test_second_lookup_is_served_from_cache(self):
+        get_active_doctor_profile()
+
+        with self.assertNumQueries(0), assert_no_deferred_loads():
+            profile = get_active_doctor_profile()
+            self.assertEqual(profile.pk, self.profile.pk)
+            self.assertEqual(profile.full_name, "Hakeem Olaosebikan")
+            self.assertEqual(profile.user.get_full_name(), "Hakeem Olaosebikan")
+
+        self.assertEqual(profile_cache.stats()["hits"], 1)
+        self.assertEqual(profile_cache.stats()["misses"], 1)
+
+    def test_profile_and_user_saves_invalidate(self):
+        get_active_doctor_profile()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.specialization = "Rheumatology & Pain"
+            self.profile.save()
+        self.assertEqual(get_active_doctor_profile().specialization, "Rheumatology & Pain")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = "Dr Hakeem"
+            self.user.save()
+        self.assertEqual(get_active_doctor_profile().user.first_name, "Dr Hakeem")
+
+    def test_admin_activation_invalidates(self):
+        get_active_doctor_profile()
+        other_user = User.objects.create_user(username="doctor2", password="pass123", role=User.ROLE_DOCTOR)
+        other = DoctorProfile(
+            user=other_user,
+            full_name="Second Doctor",
+            specialization="Rheumatology",
+            years_of_experience=5,
+            bio="Bio.",
+            is_active=True,
+        )
+
+        model_admin = DoctorProfileAdmin(DoctorProfile, AdminSite())
+        with self.captureOnCommitCallbacks(execute=True):
+            model_admin.save_model(RequestFactory().post("/"), other, form=None, change=False)
+
+        self.assertEqual(get_active_doctor_profile().pk, other.pk)
+
+    def test_missing_profile_is_cached_too(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.delete()
+        self.assertIsNone(get_active_doctor_profile())
+
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_active_doctor_profile())
@@ -1,16 +1,13 @@
 import json
 
-from django.shortcuts import get_object_or_404
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.views.generic import DetailView
 
 from core_app.mixins import SEOMixin
+from core_app.pagecache import ConditionalDetailMixin, VersionedPageCacheMixin
 from .models import DoctorProfile
 
 
-@method_decorator(cache_page(60 * 15), name="dispatch")
-class DoctorProfileDetailView(SEOMixin, DetailView):
+class DoctorProfileDetailView(ConditionalDetailMixin, VersionedPageCacheMixin, SEOMixin, DetailView):
     model = DoctorProfile
     template_name = "profiles/doctor_profile.html"
     context_object_name = "doctor"
@@ -38,10 +35,6 @@ class DoctorProfileDetailView(SEOMixin, DetailView):
             )
         )
 
-    def get_object(self, queryset=None):
-        queryset = queryset or self.get_queryset()
-        return get_object_or_404(queryset, slug=self.kwargs.get(self.slug_url_kwarg))
-
     def get_seo_title(self):
         doctor = self.get_object()
         return f"Dr {doctor.full_name} — {doctor.specialization}"
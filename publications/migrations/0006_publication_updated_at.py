@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows would otherwise all claim "modified at migration time"
+    Publication = apps.get_model("publications", "Publication")
+    Publication.objects.update(updated_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0005_alter_achievement_options_alter_publication_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -51,6 +51,7 @@ class Publication(models.Model):
 
     slug = models.SlugField(max_length=320, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-year", "-created_at"]
@@ -82,7 +82,7 @@ class PublicationDetailView(SEOMixin, DetailView):
     def get_queryset(self):
         return (
             Publication.objects.filter(is_published=True)
-            .only("title", "slug", "journal", "year", "authors", "abstract", "doi_link", "pdf")
+            .only("title", "slug", "journal", "year", "authors", "abstract", "doi_link", "pdf", "is_featured")
         )
 
     def get_seo_title(self):